@@ -0,0 +1,59 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+_CHUNK_SIZE = 1 << 20
+
+
+def hash_inputs(paths, **params):
+    """Content hash of the given files (in order) and keyword parameters."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        # separate files so that moving bytes between them changes the key
+        digest.update(b'\0')
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def derive_key(key, **params):
+    """Key for a result derived from an already cached one (e.g. an embedding of a matrix)."""
+    digest = hashlib.sha256(key.encode())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class ArrayCache:
+    """Content-addressed store of .npy arrays, read back memory-mapped.
+
+    Entries are named {kind}_{key}.npy, where key is produced by hash_inputs/derive_key, so
+    changing an input file or a parameter never returns stale data. Writes go to a temporary
+    file that is renamed into place, so an interrupted run cannot leave a truncated entry.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, kind, key):
+        return os.path.join(self.directory, f"{kind}_{key}.npy")
+
+    def contains(self, kind, key):
+        return os.path.exists(self.path(kind, key))
+
+    def load(self, kind, key, mmap_mode='r'):
+        path = self.path(kind, key)
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode=mmap_mode)
+
+    def save(self, kind, key, array):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(kind, key)
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, np.asarray(array))
+        os.replace(tmp_path, path)
+        return path
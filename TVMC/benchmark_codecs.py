@@ -0,0 +1,100 @@
+import argparse
+import csv
+import os
+
+import numpy as np
+
+from displacement_codecs import CODECS, make_displacement_codec
+from displacement_store import read_displacements
+from draco_codec import BACKENDS as DRACO_BACKENDS
+
+COLUMNS = ["store", "codec", "qp", "size", "bitrate_mbps", "mean_encoding_time_ms", "mean_decoding_time_ms",
+           "rms_error", "max_error", "failed_frames"]
+
+
+def displacement_errors(original, decoded, order_preserving, workers=-1):
+    """RMS and maximum distance between the original and the decoded displacements of one frame.
+
+    Reordered output (Draco) is matched the way the decoder does it, to the nearest decoded
+    displacement of every original one.
+    """
+    if not order_preserving:
+        from surface_fitting import nearest_indices
+
+        decoded = decoded[nearest_indices(decoded, original, workers)]
+    distances = np.linalg.norm(decoded - original, axis=1)
+    return float(np.sqrt(np.mean(np.square(distances)))), float(distances.max())
+
+
+def benchmark(displacements, codec, qp, frame_rate=30, jobs=None):
+    """Code one GoF of displacements with codec at qp and measure size, speed and error.
+
+    Size, times and errors cover the frames that coded and decoded fine; failed_frames maps the
+    position of every other frame in the GoF to its error.
+    """
+    frames = codec.encode(displacements, qp, jobs)
+    decoded = codec.decode([frame.value for frame in frames], jobs)
+    failed = {m: frame.error for m, frame in enumerate(decoded) if not frame.ok}
+    failed.update((m, frame.error) for m, frame in enumerate(frames) if not frame.ok)
+    if len(failed) == len(frames):
+        raise RuntimeError(f"{codec.name} failed on every frame: {failed[0]}")
+    ok = [m for m in range(len(frames)) if m not in failed]
+    errors = [displacement_errors(displacements[m], decoded[m].value, codec.order_preserving) for m in ok]
+    size = sum(len(frames[m].value) for m in ok)
+    encoding_times = [frames[m].time for m in ok if frames[m].time is not None]
+    decoding_times = [decoded[m].time for m in ok if decoded[m].time is not None]
+    return {
+        "codec": codec.name,
+        "qp": qp,
+        "size": size,
+        "bitrate_mbps": size * 8 / (len(ok) / frame_rate) / 1000000,
+        "mean_encoding_time_ms": float(np.mean(encoding_times)) if encoding_times else None,
+        "mean_decoding_time_ms": float(np.mean(decoding_times)) if decoding_times else None,
+        "rms_error": float(np.sqrt(np.mean([rms ** 2 for rms, _ in errors]))),
+        "max_error": max(maximum for _, maximum in errors),
+        "failed_frames": failed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare displacement codecs on the same displacements.")
+    parser.add_argument('stores', type=str, nargs='+', help="GoF displacement stores (displacements_<dataset>_<first>_<last>.npy) written by get_displacements.py or evaluation.py")
+    parser.add_argument('--codecs', type=str, nargs='+', default=list(CODECS), choices=list(CODECS), help="Codecs to compare")
+    parser.add_argument('--qps', type=int, nargs='+', default=list(range(7, 17)), help="Quantization parameters")
+    parser.add_argument('--draco_backend', type=str, default="auto", choices=DRACO_BACKENDS, help="Draco backend, see evaluation.py")
+    parser.add_argument('--encoderPath', type=str, default="../draco/build/draco_encoder", help="encoderPath (subprocess Draco backend)")
+    parser.add_argument('--decoderPath', type=str, default="../draco/build/draco_decoder", help="decoderPath (subprocess Draco backend)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="Frames coded concurrently by codecs that code frames independently")
+    parser.add_argument('--frame_rate', type=float, default=30, help="Frames per second, for the bitrate")
+    parser.add_argument('--output', type=str, default=None, help="Also write the results to this CSV file")
+    args = parser.parse_args(argv)
+
+    codecs = [make_displacement_codec(name, draco_backend=args.draco_backend, encoder_path=args.encoderPath,
+                                      decoder_path=args.decoderPath) for name in args.codecs]
+    rows = []
+    print(f"{'codec':<12} {'qp':>3} {'bytes':>10} {'Mbps':>8} {'enc (ms)':>9} {'dec (ms)':>9} {'RMS error':>10} {'max error':>10}")
+    for store in args.stores:
+        displacements = np.asarray(read_displacements(store))
+        print(os.path.basename(store))
+        for codec in codecs:
+            for qp in args.qps:
+                row = benchmark(displacements, codec, qp, args.frame_rate, args.jobs)
+                row["store"] = os.path.basename(store)
+                rows.append(row)
+                encoding = "n/a" if row["mean_encoding_time_ms"] is None else f"{row['mean_encoding_time_ms']:.2f}"
+                decoding = "n/a" if row["mean_decoding_time_ms"] is None else f"{row['mean_decoding_time_ms']:.2f}"
+                print(f"{row['codec']:<12} {qp:>3} {row['size']:>10} {row['bitrate_mbps']:>8.2f} {encoding:>9} "
+                      f"{decoding:>9} {row['rms_error']:>10.2e} {row['max_error']:>10.2e}")
+                for m, error in sorted(row["failed_frames"].items()):
+                    print(f"  frame {m} failed: {error}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Default scratch memory for the tiled distance computation (all workers together).
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Each tile keeps a running maximum, an accumulator and one scratch buffer.
+_BUFFERS_PER_TILE = 3
+
+
+def choose_block_size(num_centers, memory_budget=DEFAULT_MEMORY_BUDGET, workers=1):
+    """Largest square tile edge whose scratch buffers fit into memory_budget bytes."""
+    per_worker = memory_budget / max(1, workers)
+    block_size = int(math.sqrt(per_worker / (_BUFFERS_PER_TILE * np.dtype(np.float64).itemsize)))
+    return max(1, min(num_centers, block_size))
+
+
+def _max_squared_distances(frames, i0, i1, j0, j1):
+    # frames: list of (3, N) coordinate-major arrays
+    tile = np.zeros((i1 - i0, j1 - j0))
+    acc = np.empty_like(tile)
+    scratch = np.empty_like(tile)
+    for frame in frames:
+        np.subtract.outer(frame[0, i0:i1], frame[0, j0:j1], out=acc)
+        np.square(acc, out=acc)
+        for c in (1, 2):
+            np.subtract.outer(frame[c, i0:i1], frame[c, j0:j1], out=scratch)
+            np.square(scratch, out=scratch)
+            acc += scratch
+        np.maximum(tile, acc, out=tile)
+    return tile
+
+
+def max_distance_matrix(frames, num_centers=None, block_size=None, memory_budget=DEFAULT_MEMORY_BUDGET,
+                        workers=None, out=None):
+    """Pairwise distance matrix between volume centers, maximised over all frames.
+
+    frames is a (frames, centers, 3) array or a sequence of (centers, 3) arrays. Only the first
+    num_centers centers of each frame are used. The matrix is filled tile by tile (upper triangle
+    only, mirrored afterwards), so the scratch memory is bounded by memory_budget and never grows
+    with the number of frames. workers > 1 computes tiles on a thread pool; numpy releases the
+    GIL inside the ufuncs. out may be a preallocated (or memory-mapped) float64 matrix.
+    """
+    frames = [np.asarray(frame, dtype=np.float64) for frame in frames]
+    if not frames:
+        raise ValueError("At least one frame of volume centers is required")
+    if num_centers is None:
+        num_centers = min(len(frame) for frame in frames)
+    frames = [np.ascontiguousarray(frame[:num_centers, :3].T) for frame in frames]
+    for frame in frames:
+        if frame.shape[1] != num_centers:
+            raise ValueError(f"Frame has {frame.shape[1]} centers, expected {num_centers}")
+
+    workers = max(1, workers or 1)
+    if block_size is None:
+        block_size = choose_block_size(num_centers, memory_budget, workers)
+
+    if out is None:
+        out = np.zeros((num_centers, num_centers))
+    elif out.shape != (num_centers, num_centers):
+        raise ValueError(f"out has shape {out.shape}, expected {(num_centers, num_centers)}")
+
+    starts = range(0, num_centers, block_size)
+    tiles = [(i0, min(i0 + block_size, num_centers), j0, min(j0 + block_size, num_centers))
+             for i0 in starts for j0 in starts if j0 >= i0]
+
+    def fill(bounds):
+        i0, i1, j0, j1 = bounds
+        tile = np.sqrt(_max_squared_distances(frames, i0, i1, j0, j1))
+        out[i0:i1, j0:j1] = tile
+        if i0 != j0:
+            out[j0:j1, i0:i1] = tile.T
+
+    if workers == 1:
+        for bounds in tiles:
+            fill(bounds)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(fill, tiles))
+
+    np.fill_diagonal(out, 0.0)
+    return out
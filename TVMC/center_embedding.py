@@ -0,0 +1,102 @@
+import numpy as np
+
+BACKENDS = ("smacof", "classical", "landmark", "smacof-warm")
+
+# Rows of the distance matrix processed at once when evaluating the stress.
+_STRESS_BLOCK = 1024
+
+
+def _top_eigenpairs(B, n_components):
+    from scipy.linalg import eigh
+
+    n = B.shape[0]
+    eigenvalues, eigenvectors = eigh(B, subset_by_index=[n - n_components, n - 1])
+    order = np.argsort(eigenvalues)[::-1]
+    eigenvalues, eigenvectors = eigenvalues[order], eigenvectors[:, order]
+    # negative eigenvalues come from non-Euclidean distances and carry no coordinates
+    return np.clip(eigenvalues, 0.0, None), eigenvectors
+
+
+def classical_mds(distances, n_components=3):
+    """Torgerson (classical) MDS: top eigenvectors of the double-centred squared distances."""
+    D2 = np.square(np.asarray(distances, dtype=np.float64))
+    B = D2 - D2.mean(axis=0) - D2.mean(axis=1)[:, None] + D2.mean()
+    B *= -0.5
+    eigenvalues, eigenvectors = _top_eigenpairs(B, n_components)
+    return eigenvectors * np.sqrt(eigenvalues)
+
+
+def choose_landmarks(distances, n_landmarks, random_state=None):
+    """MaxMin landmark selection, starting from a random center."""
+    n = distances.shape[0]
+    rng = np.random.RandomState(random_state)
+    landmarks = [rng.randint(n)]
+    nearest = np.array(distances[landmarks[0]], dtype=np.float64)
+    for _ in range(1, min(n_landmarks, n)):
+        landmark = int(np.argmax(nearest))
+        landmarks.append(landmark)
+        np.minimum(nearest, distances[landmark], out=nearest)
+    return np.array(landmarks)
+
+
+def landmark_mds(distances, n_components=3, n_landmarks=500, random_state=None):
+    """Landmark MDS (de Silva & Tenenbaum).
+
+    Classical MDS is solved on n_landmarks centers only and every other center is placed by
+    distance-based triangulation, so only the landmark columns of the matrix are read.
+    """
+    landmarks = choose_landmarks(distances, n_landmarks, random_state)
+    D2_columns = np.square(np.asarray(distances[:, landmarks], dtype=np.float64))
+    D2_landmarks = D2_columns[landmarks]
+
+    B = D2_landmarks - D2_landmarks.mean(axis=0) - D2_landmarks.mean(axis=1)[:, None] + D2_landmarks.mean()
+    B *= -0.5
+    eigenvalues, eigenvectors = _top_eigenpairs(B, n_components)
+    positive = eigenvalues > 0
+    pseudo_inverse = np.zeros_like(eigenvectors)
+    pseudo_inverse[:, positive] = eigenvectors[:, positive] / np.sqrt(eigenvalues[positive])
+
+    return -0.5 * (D2_columns - D2_landmarks.mean(axis=0)) @ pseudo_inverse
+
+
+def stress(distances, embedding):
+    """Kruskal stress-1 of an embedding with respect to the target distances."""
+    from scipy.spatial.distance import cdist
+
+    residual = 0.0
+    total = 0.0
+    for start in range(0, len(embedding), _STRESS_BLOCK):
+        stop = min(start + _STRESS_BLOCK, len(embedding))
+        target = np.asarray(distances[start:stop], dtype=np.float64)
+        embedded = cdist(embedding[start:stop], embedding)
+        residual += np.sum(np.square(target - embedded))
+        total += np.sum(np.square(target))
+    return np.sqrt(residual / total) if total > 0 else 0.0
+
+
+def embed(distances, backend="smacof", n_components=3, random_state=None, n_landmarks=500,
+          n_init=6, max_iter=300, eps=1e-10):
+    """Embed the max-distance matrix into n_components dimensions with the selected backend.
+
+    smacof:      sklearn SMACOF from n_init random starts (the original behaviour)
+    classical:   classical MDS, one eigendecomposition
+    landmark:    landmark MDS, for very large numbers of centers
+    smacof-warm: a single SMACOF run started from the classical solution
+    """
+    if backend == "classical":
+        return classical_mds(distances, n_components)
+    if backend == "landmark":
+        return landmark_mds(distances, n_components, n_landmarks, random_state)
+
+    from sklearn.manifold import MDS, smacof
+
+    if backend == "smacof":
+        mds = MDS(n_components=n_components, metric=True, dissimilarity='precomputed', n_jobs=-1, eps=eps, verbose=0,
+                  random_state=random_state, n_init=n_init, max_iter=max_iter)
+        return mds.fit_transform(distances)
+    if backend == "smacof-warm":
+        init = classical_mds(distances, n_components)
+        embedding, _ = smacof(np.asarray(distances), metric=True, n_components=n_components, init=init, n_init=1,
+                              max_iter=max_iter, eps=eps, random_state=random_state)
+        return embedding
+    raise ValueError(f"Unknown MDS backend '{backend}', expected one of {BACKENDS}")
@@ -0,0 +1,77 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from array_cache import hash_inputs
+
+_INDEX_PATTERN = re.compile(r'.+?(\d+)\.([a-zA-Z0-9+])')
+
+
+def frame_index(filename):
+    """Frame number embedded in a file name such as mesh_000res_1000_012.xyz."""
+    return int(_INDEX_PATTERN.match(filename).groups()[0])
+
+
+def center_files(centers_dir, extension='.xyz'):
+    """Paths of the volume-center files in centers_dir, ordered by frame number."""
+    files = [f for f in os.listdir(centers_dir) if f.endswith(extension)]
+    return [os.path.join(centers_dir, f) for f in sorted(files, key=frame_index)]
+
+
+def read_centers(path):
+    """Parse one whitespace-separated .xyz file into an (centers, 3) float64 array."""
+    with open(path, 'r') as file:
+        text = file.read()
+    first_line = text.lstrip().split('\n', 1)[0]
+    values = np.fromstring(text, sep=' ')
+    return values.reshape(-1, len(first_line.split()))[:, :3]
+
+
+def _read_cached_centers(path, cache):
+    # frames are also cached one by one, so overlapping or adjacent groups of a long sequence
+    # only parse the frames they do not share
+    key = hash_inputs([path])
+    centers = cache.load("center_frame", key)
+    if centers is None:
+        centers = read_centers(path)
+        cache.save("center_frame", key, centers)
+    return centers
+
+
+def load_center_sequence(paths, num_centers=None, workers=None, cache=None):
+    """Load a group of center files as one contiguous (frames, centers, 3) float64 array.
+
+    Files are read on a thread pool of the given size. With an ArrayCache, the parsed group is
+    stored as a binary sidecar keyed by the file contents and returned memory-mapped on the next
+    call, so every script working on the same tracking output parses the text only once. Single
+    frames are cached as well, so a different group that shares frames reuses them.
+    """
+    paths = list(paths)
+    if cache is not None:
+        key = hash_inputs(paths, num_centers=num_centers)
+        sequence = cache.load("centers", key)
+        if sequence is not None:
+            return sequence
+
+    read = read_centers if cache is None else partial(_read_cached_centers, cache=cache)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths)))
+    if workers == 1:
+        frames = [read(path) for path in paths]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            frames = list(executor.map(read, paths))
+
+    if num_centers is None:
+        num_centers = len(frames[0])
+    sequence = np.empty((len(frames), num_centers, 3))
+    for i, (path, frame) in enumerate(zip(paths, frames)):
+        if len(frame) < num_centers:
+            raise ValueError(f"{path} has {len(frame)} centers, expected {num_centers}")
+        sequence[i] = frame[:num_centers]
+
+    if cache is not None:
+        cache.save("centers", key, sequence)
+    return sequence
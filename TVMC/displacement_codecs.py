@@ -0,0 +1,188 @@
+import lzma
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# magic, frame type, bytes per residual, vertices, origin (3), quantization step
+_HEADER = struct.Struct("<4sBBI4d")
+_MAGIC = b"TVMD"
+_KEY_FRAME, _DELTA_FRAME = 0, 1
+
+COMPRESSORS = {
+    "zlib": (lambda data: zlib.compress(data, 9), zlib.decompress),
+    "lzma": (lambda data: lzma.compress(data, preset=9), lzma.decompress),
+}
+
+
+class FrameResult:
+    """Outcome of coding one frame: the bitstream or decoded points, the time in ms (None if not
+    reported), the coder's console output and an error, if any."""
+
+    def __init__(self, value=None, time=None, output="", error=None):
+        self.value = value
+        self.time = time
+        self.output = output
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def _map_frames(function, items, jobs):
+    # frames are independent: every frame gets its own FrameResult, in frame order, and a failing
+    # frame does not stop the others
+    def run(item):
+        if item is None:
+            return FrameResult(error="not encoded")
+        try:
+            return FrameResult(*function(item))
+        except Exception as e:
+            return FrameResult(error=f"{type(e).__name__}: {e}")
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs or os.cpu_count() or 1)) as executor:
+        return list(executor.map(run, items))
+
+
+class DracoDisplacementCodec:
+    """Every frame coded on its own as a Draco point cloud (cl 10), through a draco_codec backend.
+
+    Draco reorders the points, so the decoder has to re-associate them ('lookup' reconstruction).
+    """
+
+    name = "draco"
+    extension = ".drc"
+    order_preserving = False
+
+    def __init__(self, draco):
+        self.draco = draco
+
+    @property
+    def backend(self):
+        return self.draco.name
+
+    def encode(self, displacements, qp, jobs=None):
+        return _map_frames(lambda displacement: self.draco.encode_points(displacement, qp, 10), displacements, jobs)
+
+    def decode(self, frames, jobs=None):
+        return _map_frames(self.draco.decode_points, frames, jobs)
+
+
+class DeltaCodec:
+    """Order-preserving codec: uniform quantization, temporal delta and a general-purpose compressor.
+
+    All frames of the GoF share one quantization grid: the bounding box of the GoF divided into
+    2**qp - 1 steps along its longest side, as Draco does for a single frame. The first frame stores
+    its quantized values and every following frame the difference to the previous one, so a
+    static vertex costs almost nothing. Residuals are zigzag-coded into the smallest unsigned type
+    that holds them, laid out per axis and compressed with zlib or lzma. Frames keep the vertex
+    order of the subdivided input reference mesh, so the decoder only needs the once-per-GoF map
+    from the decoded reference mesh to it ('indexed' reconstruction), no per-frame lookups.
+    Frames have to be decoded in order, so a failed frame fails every later frame of its GoF.
+    """
+
+    extension = ".tvd"
+    order_preserving = True
+    backend = None
+
+    def __init__(self, compressor="lzma"):
+        if compressor not in COMPRESSORS:
+            raise ValueError(f"Unknown compressor '{compressor}', expected one of {tuple(COMPRESSORS)}")
+        self.name = f"delta-{compressor}"
+        self.compress, self.decompress = COMPRESSORS[compressor]
+
+    def encode(self, displacements, qp, jobs=None):
+        if not 1 <= qp <= 30:
+            raise ValueError(f"qp must be between 1 and 30, got {qp}")
+        displacements = np.asarray(displacements, dtype=np.float64)
+        origin = displacements.reshape(-1, 3).min(axis=0)
+        extent = (displacements.reshape(-1, 3).max(axis=0) - origin).max()
+        step = extent / (2 ** qp - 1) if extent > 0 else 1.0
+
+        frames = []
+        previous = None
+        for displacement in displacements:
+            if frames and not frames[-1].ok:
+                frames.append(FrameResult(error="preceding frame of the GoF failed"))
+                continue
+            start = time.perf_counter()
+            try:
+                quantized = np.rint((displacement - origin) / step).astype(np.int64)
+                residuals = quantized if previous is None else quantized - previous
+                previous = quantized
+                # zigzag: small magnitudes of either sign become small unsigned values
+                zigzag = (residuals << 1) ^ (residuals >> 63)
+                itemsize = next(size for size in (1, 2, 4, 8) if zigzag.max(initial=0) < 2 ** (8 * size))
+                payload = np.ascontiguousarray(zigzag.T, dtype=f"<u{itemsize}").tobytes()
+                header = _HEADER.pack(_MAGIC, _KEY_FRAME if len(frames) == 0 else _DELTA_FRAME, itemsize,
+                                      len(displacement), *origin, step)
+                data = header + self.compress(payload)
+            except Exception as e:
+                frames.append(FrameResult(error=f"{type(e).__name__}: {e}"))
+                continue
+            frames.append(FrameResult(data, (time.perf_counter() - start) * 1000))
+        return frames
+
+    def decode(self, frames, jobs=None):
+        decoded = []
+        previous = None
+        for data in frames:
+            if data is None:
+                decoded.append(FrameResult(error="not encoded"))
+                continue
+            if decoded and not decoded[-1].ok:
+                decoded.append(FrameResult(error="preceding frame of the GoF failed"))
+                continue
+            start = time.perf_counter()
+            try:
+                magic, frame_type, itemsize, vertices, x, y, z, step = _HEADER.unpack_from(data)
+                if magic != _MAGIC:
+                    raise ValueError("Not a delta-coded displacement frame")
+                if frame_type == _DELTA_FRAME and previous is None:
+                    raise ValueError("Delta frame without the preceding frames of its GoF")
+                zigzag = np.frombuffer(self.decompress(data[_HEADER.size:]), dtype=f"<u{itemsize}").astype(np.int64)
+                residuals = ((zigzag >> 1) ^ -(zigzag & 1)).reshape(3, vertices).T
+                quantized = residuals if frame_type == _KEY_FRAME else previous + residuals
+            except Exception as e:
+                decoded.append(FrameResult(error=f"{type(e).__name__}: {e}"))
+                continue
+            previous = quantized
+            decoded.append(FrameResult(np.array([x, y, z]) + quantized * step, (time.perf_counter() - start) * 1000))
+        return decoded
+
+
+def _draco(draco_backend="auto", encoder_path=None, decoder_path=None):
+    from draco_codec import make_codec
+
+    return DracoDisplacementCodec(make_codec(draco_backend, encoder_path, decoder_path))
+
+
+# name -> factory taking the keyword options of make_displacement_codec
+CODECS = {
+    "draco": _draco,
+    "delta-zlib": lambda **options: DeltaCodec("zlib"),
+    "delta-lzma": lambda **options: DeltaCodec("lzma"),
+}
+
+
+def register_codec(name, factory):
+    """Make a displacement codec available under name.
+
+    factory is called with the keyword options of make_displacement_codec (draco_backend,
+    encoder_path, decoder_path) and returns an object with name, extension, order_preserving,
+    backend and the encode(displacements, qp, jobs) / decode(frames, jobs) methods, which return
+    one FrameResult per frame holding its bitstream or (vertices, 3) array. A failing frame is
+    reported in its FrameResult instead of raising, and decode gets None for frames whose
+    encoding failed.
+    """
+    CODECS[name] = factory
+
+
+def make_displacement_codec(name="draco", **options):
+    if name not in CODECS:
+        raise ValueError(f"Unknown displacement codec '{name}', expected one of {tuple(CODECS)}")
+    return CODECS[name](**options)
@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+
+
+def write_displacements(path, displacements):
+    """Write the (frames, vertices, 3) displacements of one GoF as a single float64 .npy file.
+
+    The store of a GoF lives at tvmc.GoFPaths.displacement_store(first_index, last_index).
+    """
+    displacements = np.ascontiguousarray(displacements, dtype=np.float64)
+    if displacements.ndim != 3 or displacements.shape[2] != 3:
+        raise ValueError(f"Expected displacements of shape (frames, vertices, 3), got {displacements.shape}")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as file:
+        np.save(file, displacements)
+    os.replace(tmp_path, path)
+
+
+def read_displacements(path, mmap_mode='r'):
+    """Memory-map a store written by write_displacements; index it with frame - first_index."""
+    return np.load(path, mmap_mode=mmap_mode)
+
+
+def write_ply(path, points):
+    """Write points as a binary little-endian float32 PLY point cloud (the input draco_encoder expects)."""
+    points = np.ascontiguousarray(points, dtype='<f4').reshape(-1, 3)
+    header = (
+        "ply\n"
+        "format binary_little_endian 1.0\n"
+        f"element vertex {len(points)}\n"
+        "property float x\n"
+        "property float y\n"
+        "property float z\n"
+        "end_header\n"
+    )
+    with open(path, 'wb') as file:
+        file.write(header.encode('ascii'))
+        file.write(points.tobytes())
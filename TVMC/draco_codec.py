@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from displacement_store import write_ply
+from draco_driver import decode_command, encode_command, parse_ms, run_chain
+
+try:
+    import DracoPy
+except ImportError:
+    # optional; without the bindings the draco_encoder/draco_decoder executables are used
+    DracoPy = None
+
+BACKENDS = ("auto", "dracopy", "subprocess")
+
+
+class SubprocessDraco:
+    """Point cloud coding with the draco_encoder and draco_decoder executables.
+
+    Every call writes its input to a temporary directory, runs the executable and reads the result
+    back. The reported times are the ones the executables print, i.e. without process start and
+    file I/O. A failing executable raises RuntimeError with its exit code and stderr.
+    """
+
+    name = "subprocess"
+
+    def __init__(self, encoder_path, decoder_path):
+        self.encoder_path = encoder_path
+        self.decoder_path = decoder_path
+
+    def _run(self, name, command):
+        job = run_chain(name, [command])
+        if not job.ok:
+            raise RuntimeError(job.error)
+        return job.results[0].stdout
+
+    def encode_points(self, points, qp, cl=10):
+        """Encoded bytes of an (N, 3) point cloud, the encoding time in ms (None if not reported) and
+        the encoder's output."""
+        directory = tempfile.mkdtemp()
+        try:
+            ply_path = os.path.join(directory, "points.ply")
+            drc_path = os.path.join(directory, "points.drc")
+            write_ply(ply_path, points)
+            stdout = self._run("encode", encode_command(self.encoder_path, ply_path, drc_path, qp, cl, point_cloud=True))
+            with open(drc_path, 'rb') as file:
+                return file.read(), parse_ms(stdout, "encode"), stdout
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def decode_points(self, data):
+        """Decoded (N, 3) points of encode_points output, the decoding time in ms (None if not reported)
+        and the decoder's output."""
+        import open3d as o3d
+
+        directory = tempfile.mkdtemp()
+        try:
+            drc_path = os.path.join(directory, "points.drc")
+            ply_path = os.path.join(directory, "points.ply")
+            with open(drc_path, 'wb') as file:
+                file.write(data)
+            stdout = self._run("decode", decode_command(self.decoder_path, drc_path, ply_path))
+            return np.asarray(o3d.io.read_point_cloud(ply_path).points), parse_ms(stdout, "decode"), stdout
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+class DracoPyDraco:
+    """Point cloud coding in memory through the DracoPy bindings.
+
+    qp and cl map to the quantization bits and compression level draco_encoder takes. The times
+    cover only the encode and decode calls; there is no console output.
+    """
+
+    name = "dracopy"
+
+    def encode_points(self, points, qp, cl=10):
+        points = np.ascontiguousarray(points, dtype=np.float32).reshape(-1, 3)
+        start = time.perf_counter()
+        data = DracoPy.encode(points, quantization_bits=qp, compression_level=cl)
+        return data, (time.perf_counter() - start) * 1000, ""
+
+    def decode_points(self, data):
+        start = time.perf_counter()
+        point_cloud = DracoPy.decode(data)
+        decoding_time = (time.perf_counter() - start) * 1000
+        return np.asarray(point_cloud.points, dtype=np.float64).reshape(-1, 3), decoding_time, ""
+
+
+def make_codec(backend="auto", encoder_path=None, decoder_path=None):
+    """Draco point cloud codec: DracoPy when it is installed ('auto') or requested, else the executables."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown Draco backend '{backend}', expected one of {BACKENDS}")
+    if backend == "dracopy" or (backend == "auto" and DracoPy is not None):
+        if DracoPy is None:
+            raise RuntimeError("The 'dracopy' Draco backend needs the DracoPy package (pip install DracoPy)")
+        return DracoPyDraco()
+    if encoder_path is None or decoder_path is None:
+        raise ValueError("The 'subprocess' Draco backend needs the encoder and decoder paths")
+    return SubprocessDraco(encoder_path, decoder_path)
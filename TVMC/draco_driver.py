@@ -0,0 +1,61 @@
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+
+def encode_command(encoder_path, input_path, output_path, qp, cl, point_cloud=False):
+    command = [encoder_path]
+    if point_cloud:
+        command.append('-point_cloud')
+    return command + ['-i', input_path, '-o', output_path, '-qp', str(qp), '-cl', str(cl)]
+
+
+def decode_command(decoder_path, input_path, output_path):
+    return [decoder_path, '-i', input_path, '-o', output_path]
+
+
+def parse_ms(stdout, action):
+    """Milliseconds reported by draco_encoder/draco_decoder, e.g. parse_ms(out, "encode")."""
+    match = re.search(rf"(\d+) ms to {action}", stdout)
+    return int(match.group(1)) if match else None
+
+
+class JobResult:
+    """Outcome of one chain of Draco commands: the completed processes and an error, if any."""
+
+    def __init__(self, name, results, error=None):
+        self.name = name
+        self.results = results
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def run_chain(name, commands):
+    """Run commands one after another (e.g. encode, then decode), stopping at the first failure."""
+    results = []
+    for command in commands:
+        try:
+            result = subprocess.run(command, capture_output=True, text=True)
+        except OSError as e:
+            return JobResult(name, results, f"{command[0]}: {e}")
+        results.append(result)
+        if result.returncode != 0:
+            return JobResult(name, results, f"{os.path.basename(command[0])} exited with code {result.returncode}: "
+                                            f"{result.stderr.strip()}")
+    return JobResult(name, results)
+
+
+def run_chains(chains, max_workers=None):
+    """Run independent command chains with at most max_workers Draco processes at a time.
+
+    chains is a list of (name, commands). Every chain captures its own stdout/stderr and a
+    failing chain does not stop the others. Results are returned in the order of chains.
+    """
+    max_workers = max(1, max_workers or os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_chain, name, commands) for name, commands in chains]
+        return [future.result() for future in futures]
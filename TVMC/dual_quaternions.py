@@ -0,0 +1,96 @@
+import numpy as np
+
+# Quaternions follow the scipy/System.Numerics layout (x, y, z, w).
+IDENTITY_QUATERNION = np.array([0.0, 0.0, 0.0, 1.0])
+
+
+def quaternion_multiply(a, b):
+    """Hamilton product of (..., 4) quaternion arrays."""
+    ax, ay, az, aw = np.moveaxis(a, -1, 0)
+    bx, by, bz, bw = np.moveaxis(b, -1, 0)
+    return np.stack([
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+        aw * bw - ax * bx - ay * by - az * bz,
+    ], axis=-1)
+
+
+def quaternion_conjugate(q):
+    return np.concatenate([-q[..., :3], q[..., 3:]], axis=-1)
+
+
+def estimate_rotations(original_centers, transformed_centers, neighbors=8):
+    """Per-center rotation quaternions fitted to each center's neighbourhood (Kabsch).
+
+    original_centers is (..., centers, 3); transformed_centers broadcasts against it. The
+    neighbourhood of a center is itself plus its nearest neighbours in the original frame.
+    All Kabsch problems of a frame batch are solved with one stacked SVD.
+    """
+    from scipy.spatial import cKDTree
+    from scipy.spatial.transform import Rotation
+
+    original_centers = np.asarray(original_centers, dtype=np.float64)
+    transformed_centers = np.broadcast_to(np.asarray(transformed_centers, dtype=np.float64), original_centers.shape)
+    batch_shape = original_centers.shape[:-2]
+    original = original_centers.reshape((-1,) + original_centers.shape[-2:])
+    transformed = transformed_centers.reshape(original.shape)
+
+    k = min(neighbors + 1, original.shape[1])
+    neighborhoods = np.stack([cKDTree(frame).query(frame, k=k, workers=-1)[1].reshape(len(frame), k)
+                              for frame in original])
+    frame_indices = np.arange(len(original))[:, None, None]
+    P = original[frame_indices, neighborhoods]
+    Q = transformed[frame_indices, neighborhoods]
+    P = P - P.mean(axis=-2, keepdims=True)
+    Q = Q - Q.mean(axis=-2, keepdims=True)
+
+    H = np.einsum('...ki,...kj->...ij', P, Q)
+    U, _, Vt = np.linalg.svd(H)
+    V = np.swapaxes(Vt, -1, -2)
+    Ut = np.swapaxes(U, -1, -2)
+    # flip the last axis where the best orthogonal fit would be a reflection
+    d = np.sign(np.linalg.det(V @ Ut))
+    d[d == 0] = 1.0
+    V[..., :, 2] *= d[..., None]
+    rotation_matrices = V @ Ut
+
+    quaternions = Rotation.from_matrix(rotation_matrices.reshape(-1, 3, 3)).as_quat()
+    quaternions[quaternions[:, 3] < 0] *= -1
+    return quaternions.reshape(batch_shape + original.shape[1:2] + (4,))
+
+
+def get_dual_quaternions(original_centers, transformed_centers, rotations=None):
+    """Unit dual quaternions moving each center from original_centers to transformed_centers.
+
+    original_centers is (..., centers, 3), e.g. a whole (frames, centers, 3) group, and
+    transformed_centers broadcasts against it. rotations are optional (..., centers, 4)
+    quaternions (see estimate_rotations); without them every transformation is a pure
+    translation. Returns the (..., centers) mask of moved centers, the dual quaternions and
+    their inverses as (..., centers, 8) float32 arrays (x, y, z, w of the real part followed by
+    the dual part). Entries of centers that did not move are left zero.
+    """
+    original_centers = np.asarray(original_centers, dtype=np.float64)
+    transformed_centers = np.broadcast_to(np.asarray(transformed_centers, dtype=np.float64), original_centers.shape)
+    if rotations is None:
+        rotations = np.broadcast_to(IDENTITY_QUATERNION, original_centers.shape[:-1] + (4,))
+        translation = transformed_centers - original_centers
+    else:
+        from scipy.spatial.transform import Rotation
+
+        rotations = np.asarray(rotations, dtype=np.float64)
+        rotated = Rotation.from_quat(rotations.reshape(-1, 4)).apply(original_centers.reshape(-1, 3))
+        translation = transformed_centers - rotated.reshape(original_centers.shape)
+
+    moved = np.any(original_centers != transformed_centers, axis=-1)
+    moved |= np.any(rotations != IDENTITY_QUATERNION, axis=-1)
+
+    translation_quat = np.concatenate([translation, np.zeros(translation.shape[:-1] + (1,))], axis=-1)
+    dual = 0.5 * quaternion_multiply(translation_quat, rotations)
+
+    dual_quaternions = np.zeros(original_centers.shape[:-1] + (8,), dtype=np.float32)
+    inverse_dual_quaternions = np.zeros_like(dual_quaternions)
+    dual_quaternions[moved] = np.concatenate([rotations, dual], axis=-1)[moved]
+    inverse_dual_quaternions[moved] = np.concatenate([quaternion_conjugate(rotations),
+                                                      quaternion_conjugate(dual)], axis=-1)[moved]
+    return moved, dual_quaternions, inverse_dual_quaternions
@@ -1,38 +1,13 @@
 import os
-import re
 
-from scipy.spatial.transform import Rotation as R
 import numpy as np
 import argparse
-import shutil
 
-def get_dual_quaternions(original_centers, transformed_centers):
-    moved_indices = []
-    for i in range(len(original_centers)):
-        if not (np.array_equal(original_centers[i], transformed_centers[i])):
-            moved_indices.append(i)
-    dual_quaternions = np.zeros((len(original_centers), 8), dtype=np.float32)
-    inverse_dual_quaternions = np.zeros((len(original_centers), 8), dtype=np.float32)
-    for i in moved_indices:
-        original = original_centers[i]
-        transformed = transformed_centers[i]
-
-        rotation_quaternion = R.from_quat([0, 0, 0, 1])
-
-        translation = transformed - original
-
-        rotation_quat = rotation_quaternion.as_quat()
-
-        translation_quat = np.hstack((translation, [0]))
-        dual_quat = np.hstack((rotation_quat, 0.5 * translation_quat))
-        dual_quaternions[i] = dual_quat
-
-        rotation_conjugate = np.hstack((-rotation_quat[:3], rotation_quat[3]))
-        inv_translation_quat = np.hstack((translation, [0]))
-        inverse_dual_quat = np.hstack((rotation_conjugate, -0.5 * inv_translation_quat))
-        inverse_dual_quaternions[i] = inverse_dual_quat
-
-    return moved_indices, dual_quaternions, inverse_dual_quaternions
+from array_cache import ArrayCache
+from center_loader import frame_index, load_center_sequence
+from staging import CHECKS, MODES
+from transformations_io import FORMATS
+from tvmc import GoFPaths, stage_gof_inputs, write_gof_transformations
 
 
 parser = argparse.ArgumentParser(description="Get transformation matrix.")
@@ -42,6 +17,12 @@ parser.add_argument('--num_centers', type=int, required=True, help="Number of vo
 parser.add_argument('--centers_dir', type=str, required=True, help="Path for the volume centers")
 parser.add_argument('--firstIndex', type=int, required=True, help="first index")
 parser.add_argument('--lastIndex', type=int, required=True, help="last index")
+parser.add_argument('--frame_offset', type=int, default=0, help="Position of the group's first frame in the sorted mesh and center files")
+parser.add_argument('--staging', type=str, default="hardlink", choices=MODES, help="How meshes and centers are placed into the TVMEditor data directory")
+parser.add_argument('--staging_check', type=str, default="stat", choices=CHECKS, help="How staged copies are checked against their sources (size and mtime, or content hash)")
+parser.add_argument('--transformations_format', type=str, default="binary", choices=FORMATS, help="File format of the indices and transformations read by TVMEditor")
+parser.add_argument('--rotations', action='store_true', help="Estimate per-center rotations from neighbourhoods instead of pure translations")
+parser.add_argument('--rotation_neighbors', type=int, default=8, help="Neighbourhood size for the rotation estimate")
 
 args = parser.parse_args()
 
@@ -51,76 +32,42 @@ num_centers = args.num_centers
 centers_dir = args.centers_dir
 firstIndex = args.firstIndex
 lastIndex = args.lastIndex
+staging = args.staging
+staging_check = args.staging_check
+transformations_format = args.transformations_format
+rotations = args.rotations
+rotation_neighbors = args.rotation_neighbors
+frame_offset = args.frame_offset
 
-mesh_path = f"../arap-volume-tracking/data/{dataset}"
-
-data_base_path = f"../tvm-editing/TVMEditor.Test/bin/Release/net5.0/Data/{dataset}_{num_centers}"
-data_subdirectories = ["centers", "meshes", "reference_center", "reference_mesh"]
-
-output_base_path = f"../tvm-editing/TVMEditor.Test/bin/Release/net5.0/output/{dataset}_{num_centers}"
-output_subdirectories = ["output", "reference"]
-
-if not os.path.exists(data_base_path):
-    os.makedirs(data_base_path)
-
-for subdir in data_subdirectories:
-    path = os.path.join(data_base_path, subdir)
-    if not os.path.exists(path):
-        os.makedirs(path)
-
-if not os.path.exists(output_base_path):
-    os.makedirs(output_base_path)
-
-for subdir in output_subdirectories:
-    path = os.path.join(output_base_path, subdir)
-    if not os.path.exists(path):
-        os.makedirs(path)
-
-re_pattern = re.compile('.+?(\d+)\.([a-zA-Z0-9+])')
+paths = GoFPaths(dataset, num_centers, None)
+mesh_path = paths.target_mesh_dir
 
 obj_files = [f for f in os.listdir(mesh_path) if f.endswith('.obj')]
-obj_files = sorted(obj_files, key=lambda x: int(re_pattern.match(x).groups()[0]))
+obj_files = sorted(obj_files, key=frame_index)
 
 xyz_files = [f for f in os.listdir(centers_dir) if f.endswith('.xyz')]
-xyz_files = sorted(xyz_files, key=lambda x: int(re_pattern.match(x).groups()[0]))
+xyz_files = sorted(xyz_files, key=frame_index)
 
-for obj_file in obj_files[:num_frames]:
-    file_path = os.path.join(mesh_path, obj_file)
-    target_path = os.path.join(data_base_path, "meshes", obj_file)
-    shutil.copy(file_path, target_path)
+# the group is num_frames consecutive frames starting at frame_offset
+obj_files = obj_files[frame_offset:frame_offset + num_frames]
+xyz_files = xyz_files[frame_offset:frame_offset + num_frames]
+center_paths = [os.path.join(centers_dir, f) for f in xyz_files]
 
-for xyz_file in xyz_files[:num_frames]:
-    file_path = os.path.join(centers_dir, xyz_file)
-    target_path = os.path.join(data_base_path, "centers", xyz_file)
-    shutil.copy(file_path, target_path)
+# link (or copy) the group's inputs into the TVMEditor data directory, skipping files that are up to date;
+# inputs of a previous group are removed, as TVMEditor loads whole directories
+staged, removed = stage_gof_inputs(paths, [os.path.join(mesh_path, f) for f in obj_files], center_paths,
+                                   os.path.join(centers_dir, "reference", "reference_centers_aligned.xyz"),
+                                   staging, staging_check)
+print(f"Staged {staged} changed input files ({staging}), removed {removed} files of other groups")
 
-reference_centers_path = os.path.join(centers_dir, "reference", "reference_centers_aligned.xyz")
-shutil.copy(reference_centers_path, os.path.join(data_base_path, "reference_center"))
-
-reference_centers_path = os.path.join(data_base_path, "reference_center/reference_centers_aligned.xyz")
+reference_centers_path = os.path.join(paths.data_dir, "reference_center/reference_centers_aligned.xyz")
 loaded_reference_centers = np.loadtxt(reference_centers_path)
 
-i = firstIndex
-for xyz_file in xyz_files[:num_frames]:
-    centers_path = os.path.join(data_base_path, "centers",xyz_file)
-    loaded_centers = np.loadtxt(centers_path)
-    print(centers_path)
-
-    indices, dual_quaternions, inverse_dual_quaternions = get_dual_quaternions(loaded_centers, loaded_reference_centers)
-    os.path.join(data_base_path, xyz_file)
-    indices_path = os.path.join(data_base_path, f"indices_{i:03}.txt")
-    np.savetxt(indices_path, indices, fmt='%d')
-
-    dual_quaternions_path = os.path.join(data_base_path, f"transformations_{i:03}.txt")
-    with open(dual_quaternions_path, 'w') as file:
-        for dq in dual_quaternions:
-            dq_str = f"{dq[0]};{dq[1]};{dq[2]};{dq[3]};{dq[4]};{dq[5]};{dq[6]};{dq[7]}"
-            file.write(dq_str + '\n')
-
-    inverse_dual_quaternions_path = os.path.join(data_base_path, f"inverse_transformations_{i:03}.txt")
-    with open(inverse_dual_quaternions_path, 'w') as file:
-        for inverse_dq in inverse_dual_quaternions:
-            inverse_dq_str = f"{inverse_dq[0]};{inverse_dq[1]};{inverse_dq[2]};{inverse_dq[3]};{inverse_dq[4]};{inverse_dq[5]};{inverse_dq[6]};{inverse_dq[7]}"
-            file.write(inverse_dq_str + '\n')
+# parse the group once (or reuse the binary sidecar written by get_reference_center.py)
+centers_sequence = load_center_sequence(center_paths, cache=ArrayCache(os.path.join(centers_dir, "cache")))
 
-    i += 1
\ No newline at end of file
+# transformations of the whole group towards the reference centers in one batch
+write_gof_transformations(paths, centers_sequence, loaded_reference_centers, firstIndex, transformations_format,
+                          rotations, rotation_neighbors)
+for xyz_file in xyz_files:
+    print(os.path.join(paths.data_dir, "centers", xyz_file))
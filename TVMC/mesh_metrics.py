@@ -0,0 +1,62 @@
+import numpy as np
+
+
+def _peak(vertices):
+    # diagonal of the axis-aligned bounding box
+    return np.linalg.norm(vertices.max(axis=0) - vertices.min(axis=0))
+
+
+def _psnr(peak, mse):
+    return 20 * np.log10(peak) - 10 * np.log10(mse)
+
+
+def metrics_from_arrays(original_vertices, original_normals, decoded_vertices, decoded_normals, workers=-1,
+                        original_tree=None):
+    """D1/D2 PSNR, log10 MSE/RMSE and Hausdorff distance between two vertex sets.
+
+    One KD-tree is built per side and each direction is a single batched 1-NN query; every
+    metric is derived from these two correspondence sets. Directional values follow the
+    original evaluation: the PSNR peak is the bounding-box diagonal of the querying side, D2
+    projects the error onto the normal of the matched vertex, D1/D2 take the better (max) and
+    MSE/RMSE the smaller of both directions. hausdorff is the symmetric Hausdorff distance
+    scaled by 1e4. original_tree is an optional cKDTree of original_vertices built earlier.
+    """
+    from scipy.spatial import cKDTree
+
+    original_vertices = np.asarray(original_vertices, dtype=np.float64)
+    decoded_vertices = np.asarray(decoded_vertices, dtype=np.float64)
+    original_normals = np.asarray(original_normals, dtype=np.float64)
+    decoded_normals = np.asarray(decoded_normals, dtype=np.float64)
+
+    distances_od, indices_od = cKDTree(decoded_vertices).query(original_vertices, k=1, workers=workers)
+    if original_tree is None:
+        original_tree = cKDTree(original_vertices)
+    distances_do, indices_do = original_tree.query(decoded_vertices, k=1, workers=workers)
+
+    mse_od = np.mean(np.square(distances_od))
+    mse_do = np.mean(np.square(distances_do))
+
+    projected_od = np.einsum('ij,ij->i', original_vertices - decoded_vertices[indices_od], decoded_normals[indices_od])
+    projected_do = np.einsum('ij,ij->i', decoded_vertices - original_vertices[indices_do], original_normals[indices_do])
+    mse2_od = np.mean(np.square(projected_od))
+    mse2_do = np.mean(np.square(projected_do))
+
+    peak_original = _peak(original_vertices)
+    peak_decoded = _peak(decoded_vertices)
+    logmse = min(np.log10(mse_od), np.log10(mse_do))
+    return {
+        "d1": max(_psnr(peak_original, mse_od), _psnr(peak_decoded, mse_do)),
+        "d2": max(_psnr(peak_original, mse2_od), _psnr(peak_decoded, mse2_do)),
+        "logmse": logmse,
+        "logrmse": 0.5 * logmse,
+        "hausdorff": max(distances_od.max(), distances_do.max()) * 1e4,
+    }
+
+
+def compute_metrics(original_mesh, decoded_mesh, workers=-1):
+    """metrics_from_arrays for two Open3D triangle meshes (vertex normals are recomputed)."""
+    original_mesh.compute_vertex_normals()
+    decoded_mesh.compute_vertex_normals()
+    return metrics_from_arrays(np.asarray(original_mesh.vertices), np.asarray(original_mesh.vertex_normals),
+                               np.asarray(decoded_mesh.vertices), np.asarray(decoded_mesh.vertex_normals),
+                               workers)
@@ -1,9 +1,11 @@
 import os
 
 import matplotlib.pyplot as plt
-import open3d as o3d
 import numpy as np
 
+from displacement_store import read_displacements
+from tvmc import GoFPaths
+
 
 path = "./figures"
 if not os.path.exists(path):
@@ -171,6 +173,9 @@ plt.show()
 
 
 ## Figure 7: Cumulative distribution function (CDF) of deformation distance for "Basketball player" and "Thomas".
+# only this figure needs open3d (to subdivide the reference mesh)
+import open3d as o3d
+
 loaded_decimated_reference_mesh = o3d.io.read_triangle_mesh('../tvm-editing/TVMEditor.Test/bin/Release/net5.0/Data/basketball_player_1995/reference_mesh/decimated_reference_mesh.obj', enable_post_processing=False)
 #print(loaded_decimated_reference_mesh)
 subdivided_decimated_reference_mesh = o3d.geometry.TriangleMesh.subdivide_midpoint(loaded_decimated_reference_mesh, number_of_iterations=1)
@@ -200,7 +205,8 @@ selected_points_cloud.points = o3d.utility.Vector3dVector(selected_vertices)
 
 #o3d.visualization.draw_geometries([subdivided_decimated_reference_mesh, selected_points_cloud])
 
-displacement = np.loadtxt('../tvm-editing/TVMEditor.Test/bin/Release/net5.0/output/basketball_player_1995/reference/displacements_basketball_player_018.txt')
+# frame 18 of the basketball_player GoF 11..20
+displacement = read_displacements(GoFPaths('basketball_player', 1995, 'basketball_player_fr0').displacement_store(11, 20))[18 - 11]
 
 dis_select = []
 for i in range (selected_ids.__len__()):
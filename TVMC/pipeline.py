@@ -0,0 +1,262 @@
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from array_cache import hash_inputs
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+STATE_DIR = os.path.join(ROOT_DIR, "TVMC", ".pipeline")
+
+EDITOR_DIR = "tvm-editing/TVMEditor.Test/bin/Release/net5.0"
+
+# every Python stage depends on its entry script and the modules it imports, which are all part of
+# these patterns; hashing all of them reruns a little more than needed but never reuses stale outputs
+PYTHON_SOURCES = ["TVMC/*.py", "TVMC/tvmc/*.py"]
+
+
+def executable_patterns(path):
+    """Input patterns of an executable: path as given and with .exe, as it is called on Windows."""
+    return [path] if path.lower().endswith(".exe") else [path, path + ".exe"]
+
+
+# the external tools, so rebuilding one of them reruns the stages that use it
+TRACKING_TOOLS = ["arap-volume-tracking/bin/*.dll"]
+EDITOR_TOOLS = executable_patterns(f"{EDITOR_DIR}/TVMEditor.Test") + [f"{EDITOR_DIR}/*.dll"]
+
+# the datasets of run_pipeline.sh
+DATASETS = {
+    "basketball_player": dict(experiment="basketball", num_centers=1995, firstIndex=11, lastIndex=20, key=9,
+                              fileNamePrefix="basketball_player_fr0",
+                              centers_dir="arap-volume-tracking/data/basketball-output-max-2000/impr",
+                              tracking_configs=["config/max/config-basketball-max.xml",
+                                                "config/impr/config-basketball-impr.xml"]),
+    "dancer": dict(experiment="dancer", num_centers=2000, firstIndex=5, lastIndex=14, key=4,
+                   fileNamePrefix="dancer_fr0", centers_dir="arap-volume-tracking/data/dancer-output-max-2000",
+                   tracking_configs=["config/max/config-dancer-max.xml"]),
+    "mitch": dict(experiment="mitch", num_centers=2000, firstIndex=1, lastIndex=10, key=4,
+                  fileNamePrefix="mitch_fr0", centers_dir="arap-volume-tracking/data/mitch-output-max-2000",
+                  tracking_configs=["config/max/config-mitch-max.xml"]),
+    "thomas": dict(experiment="thomas", num_centers=2000, firstIndex=1, lastIndex=10, key=4,
+                   fileNamePrefix="thomas_fr0", centers_dir="arap-volume-tracking/data/thomas-output-max-2000",
+                   tracking_configs=["config/max/config-thomas-max.xml"]),
+}
+
+
+class Stage:
+    """One step of the pipeline.
+
+    commands run one after another in cwd (relative to the repository root). inputs and outputs
+    are glob patterns relative to the repository root; a stage is fresh when the content hash of
+    its inputs and commands matches the one taken when its last successful run started and every
+    output pattern matches at least one file. Python stages and external (.NET, Draco) tools are
+    handled the same way: the Python sources and the executables a stage runs are listed among
+    its inputs, so changing the code that does the work reruns the stage. Patterns may also be
+    absolute paths.
+    """
+
+    def __init__(self, name, commands, cwd, inputs, outputs, deps=()):
+        self.name = name
+        self.commands = commands
+        self.cwd = cwd
+        self.inputs = inputs
+        self.outputs = outputs
+        self.deps = list(deps)
+
+    def input_hash(self):
+        paths = []
+        matched = []
+        for pattern in self.inputs:
+            files = sorted(path for path in glob.glob(os.path.join(ROOT_DIR, pattern)) if os.path.isfile(path))
+            paths += files
+            matched.append([os.path.relpath(path, ROOT_DIR) for path in files])
+        return hash_inputs(paths, commands=self.commands, inputs=matched)
+
+    def outputs_exist(self):
+        return all(glob.glob(os.path.join(ROOT_DIR, pattern)) for pattern in self.outputs)
+
+
+def dataset_stages(dataset, config, qp, encoder_path, decoder_path, python=sys.executable):
+    """The stage graph of run_pipeline.sh for one dataset."""
+    num_centers = config["num_centers"]
+    first, last = config["firstIndex"], config["lastIndex"]
+    num_frames = last - first + 1
+    name = f"{dataset}_{num_centers}"
+    data = f"{EDITOR_DIR}/Data/{name}"
+    output = f"{EDITOR_DIR}/output/{name}"
+    centers_dir = config["centers_dir"]
+    meshes = f"arap-volume-tracking/data/{dataset}/*.obj"
+    common = ["--dataset", dataset, "--num_frames", str(num_frames), "--num_centers", str(num_centers)]
+    window = ["--firstIndex", str(first), "--lastIndex", str(last)]
+    editor = ["TVMEditor.Test/bin/Release/net5.0/TVMEditor.Test", config["experiment"]]
+    editor_paths = [f"./TVMEditor.Test/bin/Release/net5.0/Data/{name}/", f"./TVMEditor.Test/bin/Release/net5.0/output/{name}/"]
+    output_path = f"./{dataset}_outputs"
+    # the Draco paths are given relative to TVMC, where the evaluation runs
+    draco_tools = [pattern for path in (encoder_path, decoder_path)
+                   for pattern in executable_patterns(os.path.normpath(os.path.join("TVMC", path)))]
+
+    return [
+        Stage("tracking", [["dotnet", "./bin/Client.dll", "./" + path] for path in config["tracking_configs"]],
+              "arap-volume-tracking",
+              [f"arap-volume-tracking/{path}" for path in config["tracking_configs"]] + [meshes] + TRACKING_TOOLS,
+              [f"{centers_dir}/*.xyz"]),
+        Stage("reference_centers", [[python, "get_reference_center.py"] + common + ["--centers_dir", "../" + centers_dir]],
+              "TVMC", PYTHON_SOURCES + [f"{centers_dir}/*.xyz"],
+              [f"{centers_dir}/reference/reference_centers_aligned.xyz"], ["tracking"]),
+        Stage("transformations", [[python, "get_transformation.py"] + common + window + ["--centers_dir", "../" + centers_dir]],
+              "TVMC", PYTHON_SOURCES + [meshes, f"{centers_dir}/*.xyz",
+                       f"{centers_dir}/reference/reference_centers_aligned.xyz"],
+              [f"{data}/transformations_*", f"{data}/inverse_transformations_*"], ["reference_centers"]),
+        Stage("deform_groups", [editor + ["1", str(first), str(last)] + editor_paths], "tvm-editing",
+              [f"{data}/meshes/*.obj", f"{data}/centers/*.xyz", f"{data}/indices_*", f"{data}/transformations_*"] + EDITOR_TOOLS,
+              [f"{output}/output/deformed_*.obj"], ["transformations"]),
+        Stage("reference_mesh", [[python, "extract_reference_mesh.py"] + common + window + [
+            "--inputDir", f"../{output}/output/", "--outputDir", f"../{data}/reference_mesh/", "--key", str(config["key"])]],
+              "TVMC", PYTHON_SOURCES + [f"{output}/output/deformed_*.obj"],
+              [f"{data}/reference_mesh/decimated_reference_mesh.obj"], ["deform_groups"]),
+        Stage("deform_reference", [editor + ["2", str(first), str(last)] + editor_paths], "tvm-editing",
+              [f"{data}/reference_mesh/decimated_reference_mesh.obj", f"{data}/reference_center/*.xyz",
+               f"{data}/indices_*", f"{data}/inverse_transformations_*"] + EDITOR_TOOLS,
+              [f"{output}/reference/deformed_reference_mesh_*.obj"], ["reference_mesh"]),
+        Stage("displacements", [[python, "get_displacements.py"] + common + window + [
+            "--target_mesh_path", f"../arap-volume-tracking/data/{dataset}"]],
+              "TVMC", PYTHON_SOURCES + [meshes, f"{output}/reference/deformed_reference_mesh_*.obj",
+                       f"{data}/reference_mesh/decimated_reference_mesh.obj"],
+              [f"{output}/reference/displacements_{dataset}_*.npy", f"{data}/reference_mesh/dis_{dataset}_*.ply"],
+              ["deform_reference"]),
+        Stage("evaluation", [[python, "evaluation.py"] + common + window + [
+            "--fileNamePrefix", config["fileNamePrefix"], "--encoderPath", encoder_path, "--decoderPath", decoder_path,
+            "--qp", str(qp), "--outputPath", output_path]],
+              "TVMC", PYTHON_SOURCES + draco_tools + [meshes, f"{data}/meshes/*.obj",
+                       f"{output}/reference/deformed_reference_mesh_*.obj",
+                       f"{data}/reference_mesh/decimated_reference_mesh.obj"],
+              [f"TVMC/{output_path[2:]}/decoded_{dataset}_*.obj"], ["displacements"]),
+    ]
+
+
+def topological_order(stages):
+    by_name = {stage.name: stage for stage in stages}
+    ordered, visiting, visited = [], set(), set()
+
+    def visit(stage):
+        if stage.name in visited:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"Dependency cycle at stage '{stage.name}'")
+        visiting.add(stage.name)
+        for dep in stage.deps:
+            if dep in by_name:
+                visit(by_name[dep])
+        visiting.discard(stage.name)
+        visited.add(stage.name)
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return ordered
+
+
+class Pipeline:
+    """Runs the stage graph of one dataset, skipping stages whose inputs did not change.
+
+    The input hash of every successful stage is kept in .pipeline/<dataset>.json and the output
+    of every command goes to .pipeline/logs/<dataset>_<stage>.log.
+    """
+
+    _print_lock = threading.Lock()
+
+    def __init__(self, dataset, stages, force=()):
+        self.dataset = dataset
+        self.stages = topological_order(stages)
+        self.force = set(force)
+        self.state_path = os.path.join(STATE_DIR, f"{dataset}.json")
+        self.state = {}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, 'r') as file:
+                self.state = json.load(file)
+
+    def log(self, message):
+        with self._print_lock:
+            print(f"[{self.dataset}] {message}", flush=True)
+
+    def _save_state(self):
+        os.makedirs(STATE_DIR, exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(self.state, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    def _execute(self, stage):
+        log_path = os.path.join(STATE_DIR, "logs", f"{self.dataset}_{stage.name}.log")
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        with open(log_path, 'w') as log_file:
+            for command in stage.commands:
+                log_file.write(f"$ {' '.join(command)}\n")
+                log_file.flush()
+                try:
+                    returncode = subprocess.run(command, cwd=os.path.join(ROOT_DIR, stage.cwd), stdout=log_file,
+                                                stderr=subprocess.STDOUT).returncode
+                except OSError as e:
+                    raise RuntimeError(f"stage '{stage.name}' could not start {command[0]}: {e}")
+                if returncode != 0:
+                    raise RuntimeError(f"stage '{stage.name}' failed with code {returncode}, see {log_path}")
+
+    def run(self, only=None):
+        """Run the stages in dependency order. Returns the names of the stages that ran."""
+        ran = []
+        for stage in self.stages:
+            if only is not None and stage.name not in only:
+                continue
+            key = stage.input_hash()
+            if stage.name not in self.force and self.state.get(stage.name) == key and stage.outputs_exist():
+                self.log(f"{stage.name}: up to date")
+                continue
+            self.log(f"{stage.name}: running")
+            self._execute(stage)
+            # the hash of the inputs the stage started from: inputs edited while it ran rerun it next time
+            self.state[stage.name] = key
+            self._save_state()
+            ran.append(stage.name)
+        return ran
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the TVMC pipeline, redoing only stages whose inputs changed.")
+    parser.add_argument('--datasets', type=str, nargs='+', default=list(DATASETS), choices=list(DATASETS), help="Datasets to process")
+    parser.add_argument('--stages', type=str, nargs='+', default=None, help="Only consider these stages (default: all)")
+    parser.add_argument('--force', type=str, nargs='*', default=(), help="Stages to run even when they are up to date")
+    parser.add_argument('--qp', type=int, default=10, help="qp")
+    parser.add_argument('--encoderPath', type=str, default="../draco/build/draco_encoder", help="encoderPath (relative to TVMC)")
+    parser.add_argument('--decoderPath', type=str, default="../draco/build/draco_decoder", help="decoderPath (relative to TVMC)")
+    parser.add_argument('--jobs', type=int, default=len(DATASETS), help="Datasets processed concurrently")
+    args = parser.parse_args(argv)
+
+    pipelines = [Pipeline(dataset, dataset_stages(dataset, DATASETS[dataset], args.qp, args.encoderPath, args.decoderPath),
+                          args.force)
+                 for dataset in args.datasets]
+
+    def run(pipeline):
+        try:
+            return pipeline.run(args.stages), None
+        except RuntimeError as e:
+            pipeline.log(str(e))
+            return None, e
+
+    # datasets share no files, so their stage graphs run side by side
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        results = list(executor.map(run, pipelines))
+
+    failed = [pipeline.dataset for pipeline, (_, error) in zip(pipelines, results) if error is not None]
+    for pipeline, (ran, error) in zip(pipelines, results):
+        if error is None:
+            print(f"{pipeline.dataset}: ran {', '.join(ran) if ran else 'nothing'}")
+    if failed:
+        raise SystemExit(f"failed: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import time
+
+import numpy as np
+
+from surface_fitting import nearest_indices
+
+MODES = ("lookup", "indexed", "ordered")
+
+
+def reconstruct_vertices(subdivided_vertices, decoded_displacements, original_displacements=None,
+                         reference_indices=None, mode="lookup", workers=-1):
+    """Apply one frame's decoded displacements to the subdivided decoded reference mesh.
+
+    mode='lookup' re-associates the displacements like the original per-vertex loop, but with
+    batched queries: reference_indices maps every subdivided decoded vertex to its nearest
+    vertex of the subdivided input reference mesh, and the displacement at that vertex is
+    matched to the nearest decoded displacement. mode='indexed' is for codecs that keep the order
+    of the subdivided input reference mesh: only reference_indices is used, no per-frame lookup.
+    mode='ordered' skips both lookups and assumes the decoded displacements are in the same order
+    as the subdivided decoded vertices.
+    """
+    subdivided_vertices = np.asarray(subdivided_vertices)
+    decoded_displacements = np.asarray(decoded_displacements)
+    if mode == "ordered":
+        if decoded_displacements.shape != subdivided_vertices.shape:
+            raise ValueError(f"{len(decoded_displacements)} decoded displacements for {len(subdivided_vertices)} "
+                             f"vertices, 'ordered' reconstruction needs one per vertex")
+        return subdivided_vertices + decoded_displacements
+    if mode == "indexed":
+        return subdivided_vertices + decoded_displacements[reference_indices]
+    if mode != "lookup":
+        raise ValueError(f"Unknown reconstruction mode '{mode}', expected one of {MODES}")
+
+    queries = np.asarray(original_displacements)[reference_indices]
+    return subdivided_vertices + decoded_displacements[nearest_indices(decoded_displacements, queries, workers)]
+
+
+class GoFDecoder:
+    """Decoder state shared by all frames of a group of frames (GoF).
+
+    The decoded reference mesh is subdivided once and, when the input reference mesh is given,
+    matched once against its subdivision, whose vertex order the displacements follow. Nothing
+    here depends on the qp or the codec, so one decoder serves every evaluation of a GoF;
+    reconstruct then only applies one frame's displacements, in the decoder's mode unless another
+    one is passed. subdivision_time and index_time hold the seconds spent on this setup.
+    """
+
+    def __init__(self, decoded_reference_mesh, reference_mesh=None, mode="lookup", workers=-1):
+        import open3d as o3d
+
+        if mode not in MODES:
+            raise ValueError(f"Unknown reconstruction mode '{mode}', expected one of {MODES}")
+        self.mode = mode
+        self.workers = workers
+
+        start = time.time()
+        subdivided_decoded_mesh = o3d.geometry.TriangleMesh.subdivide_midpoint(decoded_reference_mesh, number_of_iterations=1)
+        self.subdivision_time = time.time() - start
+        self.triangles = np.asarray(subdivided_decoded_mesh.triangles).copy()
+        self.vertices = np.asarray(subdivided_decoded_mesh.vertices).copy()
+
+        self.reference_indices = None
+        self.index_time = 0
+        if reference_mesh is not None:
+            subdivided_reference_mesh = o3d.geometry.TriangleMesh.subdivide_midpoint(reference_mesh, number_of_iterations=1)
+            start = time.time()
+            self.reference_indices = nearest_indices(np.asarray(subdivided_reference_mesh.vertices), self.vertices, workers)
+            self.index_time = time.time() - start
+        elif mode != "ordered":
+            raise ValueError(f"'{mode}' reconstruction needs the input reference mesh")
+
+    def reconstruct(self, decoded_displacements, original_displacements=None, mode=None):
+        mode = mode or self.mode
+        if mode != "ordered" and self.reference_indices is None:
+            raise ValueError(f"'{mode}' reconstruction needs a decoder built with the input reference mesh")
+        return reconstruct_vertices(self.vertices, decoded_displacements, original_displacements,
+                                    self.reference_indices, mode, self.workers)
+
+    def decode_frame(self, decoded_displacements, original_displacements=None):
+        """Reconstructed Open3D mesh for one frame."""
+        import open3d as o3d
+
+        mesh = o3d.geometry.TriangleMesh()
+        mesh.vertices = o3d.utility.Vector3dVector(self.reconstruct(decoded_displacements, original_displacements))
+        mesh.triangles = o3d.utility.Vector3iVector(self.triangles)
+        return mesh
@@ -0,0 +1,133 @@
+import time
+
+import numpy as np
+
+AUTO_DEPTHS = (6, 7, 8, 9, 10)
+
+
+def aggregate_point_sets(point_sets):
+    """Concatenate (points, normals) pairs into one preallocated points and one normals array.
+
+    The output arrays are sized for the whole GoF up front and filled in place. Entries of
+    point_sets are released (set to None) as soon as they are copied, so peak memory stays
+    close to one copy of the aggregated points rather than growing with repeated mesh merges.
+    """
+    total = sum(len(points) for points, _ in point_sets)
+    aggregated_points = np.empty((total, 3))
+    aggregated_normals = np.empty((total, 3))
+    offset = 0
+    for k in range(len(point_sets)):
+        points, normals = point_sets[k]
+        point_sets[k] = None
+        aggregated_points[offset:offset + len(points)] = points
+        aggregated_normals[offset:offset + len(points)] = normals
+        offset += len(points)
+    return aggregated_points, aggregated_normals
+
+
+def oriented_point_cloud(points, normals, voxel_size=0):
+    """Open3D point cloud with normals, optionally averaged onto a voxel grid of edge voxel_size."""
+    import open3d as o3d
+
+    point_cloud = o3d.geometry.PointCloud()
+    point_cloud.points = o3d.utility.Vector3dVector(points)
+    point_cloud.normals = o3d.utility.Vector3dVector(normals)
+    if voxel_size > 0:
+        point_cloud = point_cloud.voxel_down_sample(voxel_size)
+        # averaged normals are no longer unit length
+        point_cloud.normalize_normals()
+    return point_cloud
+
+
+def _memory_mb(field):
+    # VmRSS (current) or VmHWM (peak) resident memory of the process, in kB in /proc/self/status
+    with open('/proc/self/status') as file:
+        for line in file:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+    return None
+
+
+def _start_memory_measurement():
+    """Reset the peak resident memory of the process to its current value and return that value
+    in MB. Only Linux supports this; elsewhere (or without access to /proc) returns None."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+        return _memory_mb('VmRSS')
+    except OSError:
+        return None
+
+
+def _peak_memory_mb(start):
+    # peak since _start_memory_measurement, above the memory in use when it was called
+    if start is None:
+        return None
+    peak = _memory_mb('VmHWM')
+    return None if peak is None else max(0.0, peak - start)
+
+
+def poisson_reconstruction(point_cloud, depth=9, scale=1.1, density_quantile=0):
+    """Screened Poisson surface of point_cloud.
+
+    scale is the ratio between the reconstruction cube and the bounding box of the points.
+    With density_quantile > 0 the vertices whose Poisson density falls below that quantile are
+    removed, which trims the surface Poisson extrapolates into regions without samples.
+    """
+    import open3d as o3d
+
+    with o3d.utility.VerbosityContextManager(o3d.utility.VerbosityLevel.Debug) as cm:
+        mesh, densities = o3d.geometry.TriangleMesh.create_from_point_cloud_poisson(point_cloud, depth=depth, scale=scale,
+                                                                                    linear_fit=True)
+    if density_quantile > 0:
+        densities = np.asarray(densities)
+        mesh.remove_vertices_by_mask(densities < np.quantile(densities, density_quantile))
+    return mesh
+
+
+def surface_error(mesh, points):
+    """RMS distance from points to the surface of mesh."""
+    import open3d as o3d
+
+    scene = o3d.t.geometry.RaycastingScene()
+    scene.add_triangles(o3d.t.geometry.TriangleMesh.from_legacy(mesh))
+    distances = scene.compute_distance(o3d.core.Tensor(np.asarray(points, dtype=np.float32))).numpy()
+    return float(np.sqrt(np.mean(np.square(distances))))
+
+
+def auto_poisson_reconstruction(point_cloud, target_triangles, max_error, scale=1.1, density_quantile=0,
+                                depths=AUTO_DEPTHS):
+    """Poisson reconstruction at the lowest depth that meets a triangle budget and an error bound.
+
+    Depths are tried in increasing order. A depth is accepted once its surface has at least
+    target_triangles triangles (so the following decimation can still reach its budget) and the
+    RMS distance from the input points to the surface is at most max_error times the diagonal of
+    their bounding box. If no depth qualifies, the deepest surface is returned. The second return
+    value holds one entry per tried depth with its triangles, error, time and the peak resident
+    memory of the reconstruction at that depth, above what the process used before it (Linux
+    only, None elsewhere).
+    """
+    points = np.asarray(point_cloud.points)
+    diagonal = np.linalg.norm(points.max(axis=0) - points.min(axis=0))
+    report = []
+    for depth in depths:
+        memory = _start_memory_measurement()
+        start = time.time()
+        mesh = poisson_reconstruction(point_cloud, depth, scale, density_quantile)
+        seconds = time.time() - start
+        peak_memory = _peak_memory_mb(memory)
+        triangles = len(mesh.triangles)
+        error = surface_error(mesh, points) / diagonal
+        report.append({"depth": depth, "triangles": triangles, "relative_error": error, "seconds": seconds,
+                       "peak_memory_mb": peak_memory})
+        if triangles >= target_triangles and error <= max_error:
+            break
+    return mesh, report
+
+
+def print_depth_report(report):
+    # memory is the peak of each depth on its own, not the high-water mark of the process
+    print("depth  triangles  rel. error    time (s)  peak memory (MB)")
+    for entry in report:
+        memory = "n/a" if entry["peak_memory_mb"] is None else f"{entry['peak_memory_mb']:.0f}"
+        print(f"{entry['depth']:>5}  {entry['triangles']:>9}  {entry['relative_error']:>10.2e}  {entry['seconds']:>10.3f}  {memory:>16}")
@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import subprocess
+import time
+
+import numpy as np
+
+import center_embedding
+from array_cache import ArrayCache, hash_inputs
+from center_loader import center_files
+from displacement_codecs import CODECS
+from evaluation import build_parser as build_evaluation_parser, evaluate_qp, prepare_gof
+from staging import Stager
+from tvmc import (GoFPaths, SequenceFrames, extract_reference_mesh, reference_centers, stage_gof_inputs,
+                  write_gof_transformations)
+
+TVMC_DIR = os.path.dirname(os.path.abspath(__file__))
+TVM_EDITING_DIR = os.path.join(TVMC_DIR, "..", "tvm-editing")
+
+
+def gof_windows(first_index, last_index, gof_size, stride=None):
+    """(first, last) frame indices of every GoF of the sequence first_index..last_index.
+
+    Windows start every stride frames (gof_size by default, i.e. no overlap); the last one is
+    shortened to end at last_index.
+    """
+    stride = stride or gof_size
+    if gof_size < 1 or stride < 1:
+        raise ValueError("gof_size and stride must be positive")
+    start = first_index
+    while start <= last_index:
+        yield start, min(start + gof_size - 1, last_index)
+        if start + gof_size - 1 >= last_index:
+            break
+        start += stride
+
+
+def completed_windows(results_path):
+    if not os.path.exists(results_path):
+        return set()
+    with open(results_path, 'r') as file:
+        return {(entry["firstIndex"], entry["lastIndex"]) for entry in map(json.loads, file) if entry.get("ok")}
+
+
+def run_editor(args, mode, first, last):
+    """One TVMEditor pass over the frames first..last (1 deforms the frames, 2 the reference mesh)."""
+    name = f"{args.dataset}_{args.num_centers}"
+    command = [args.tvmeditor, args.experiment, str(mode), str(first), str(last),
+               f"./TVMEditor.Test/bin/Release/net5.0/Data/{name}/", f"./TVMEditor.Test/bin/Release/net5.0/output/{name}/"]
+    print(f"[TVMEditor] {' '.join(command)}", flush=True)
+    try:
+        returncode = subprocess.run(command, cwd=TVM_EDITING_DIR).returncode
+    except OSError as e:
+        raise RuntimeError(f"{command[0]}: {e}")
+    if returncode != 0:
+        raise RuntimeError(f"TVMEditor pass {mode} exited with code {returncode}")
+
+
+def _write_mesh(path, mesh):
+    import open3d as o3d
+
+    o3d.io.write_triangle_mesh(path, mesh, write_vertex_normals=False, write_vertex_colors=False, write_triangle_uvs=False)
+
+
+def run_gof(args, frames, first, last):
+    """Steps 2-7 for the frames first..last; returns the result dict of evaluation.evaluate_qp.
+
+    Everything runs in this process except the two TVMEditor passes. frames is the
+    tvmc.SequenceFrames of the sequence: the centers, original meshes and KD-trees of frames
+    shared with the previous GoF are reused, new frames are loaded and all others dropped. The
+    reference centers, reference mesh and its coded files are kept per GoF
+    (..._<first>_<last>), TVMEditor gets a copy under the names it reads.
+    """
+    num_frames = last - first + 1
+    key = min(args.key if args.key is not None else num_frames // 2, num_frames - 1)
+    paths = frames.paths.for_gof(first, last)
+    frames.retain(first, last)
+    indices = range(first, last + 1)
+
+    # Step 2: reference centers; distance matrix and embedding share the cache of get_reference_center.py
+    center_paths = [frames.center_path(i) for i in indices]
+    centers = frames.centers(first, last)
+    reference = reference_centers(centers, args.num_centers, args.random_state, args.mds_backend,
+                                  cache=frames.center_cache,
+                                  key=hash_inputs(center_paths, num_frames=num_frames, num_centers=args.num_centers),
+                                  workers=args.processes)
+    print(f"reference centers: MDS stress-1 {reference['stress']:.6f}, random_state = {reference['random_state']}")
+    reference_centers_path = os.path.join(args.centers_dir, "reference", f"reference_centers_aligned_{first:03}_{last:03}.xyz")
+    os.makedirs(os.path.dirname(reference_centers_path), exist_ok=True)
+    np.savetxt(reference_centers_path, reference["centers"], fmt='%f', delimiter=' ')
+
+    # Step 3: stage the GoF and write its transformations, from the reference centers as TVMEditor reads them
+    staged, removed = stage_gof_inputs(paths, [paths.target_mesh(i) for i in indices], center_paths,
+                                       reference_centers_path)
+    print(f"staged {staged} changed input files, removed {removed} files of other GoFs")
+    write_gof_transformations(paths, centers, np.loadtxt(reference_centers_path), first)
+    run_editor(args, 1, first, last)
+
+    # Step 4: reference mesh, then deform it towards every frame
+    workers = 1 if args.processes > 1 else -1
+    reference_mesh = extract_reference_mesh([paths.deformed_mesh(i) for i in indices], key, args.processes, workers)
+    print(f"reference mesh: {len(reference_mesh['mesh'].triangles)} triangles from {reference_mesh['points']} points")
+    _write_mesh(paths.reference_mesh, reference_mesh["mesh"])
+    del reference_mesh
+    stager = Stager(paths.data_dir)
+    stager.stage(paths.reference_mesh, paths.editor_reference_mesh)
+    stager.save()
+    run_editor(args, 2, first, last)
+
+    # Steps 6-7: fitting on the original meshes held by frames, displacements, coding and evaluation
+    evaluation_args = build_evaluation_parser().parse_args([
+        "--dataset", args.dataset, "--num_frames", str(num_frames), "--num_centers", str(args.num_centers),
+        "--firstIndex", str(first), "--lastIndex", str(last), "--fileNamePrefix", args.fileNamePrefix,
+        "--encoderPath", args.encoderPath, "--decoderPath", args.decoderPath, "--qp", str(args.qp),
+        "--outputPath", args.outputPath, "--codec", args.codec, "--per_gof_reference"])
+    gof = prepare_gof(evaluation_args, frames=frames)
+    return evaluate_qp(evaluation_args, gof, args.qp, args.outputPath)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compress a long sequence GoF by GoF.")
+    parser.add_argument('--dataset', type=str, required=True, help="Dataset name (e.g., 'basketball_player')")
+    parser.add_argument('--experiment', type=str, required=True, help="TVMEditor experiment name (e.g., 'basketball')")
+    parser.add_argument('--num_centers', type=int, required=True, help="Number of volume centers (pointCount)")
+    parser.add_argument('--centers_dir', type=str, required=True, help="Path for the volume centers of the whole sequence")
+    parser.add_argument('--firstIndex', type=int, required=True, help="first index of the sequence")
+    parser.add_argument('--lastIndex', type=int, required=True, help="last index of the sequence")
+    parser.add_argument('--frame_offset', type=int, default=0, help="Position of frame firstIndex in the sorted center files")
+    parser.add_argument('--gof_size', type=int, default=10, help="Frames per group of frames")
+    parser.add_argument('--stride', type=int, default=None, help="Frames between the starts of consecutive GoFs (default: gof_size, i.e. no overlap; frames are only shared and reused between GoFs with --stride < --gof_size)")
+    parser.add_argument('--key', type=int, default=None, help="Key mesh within each GoF (default: the middle frame)")
+    parser.add_argument('--random_state', type=int, default=None, help="Seed for MDS (for reproducibility)")
+    parser.add_argument('--mds_backend', type=str, default="smacof", choices=center_embedding.BACKENDS, help="Embedding backend for the distance matrix")
+    parser.add_argument('--fileNamePrefix', type=str, required=True, help="fileNamePrefix")
+    parser.add_argument('--encoderPath', type=str, required=True, help="encoderPath")
+    parser.add_argument('--decoderPath', type=str, required=True, help="decoderPath")
+    parser.add_argument('--qp', type=int, required=True, help="qp")
+    parser.add_argument('--codec', type=str, default="draco", choices=list(CODECS), help="Displacement codec, see evaluation.py")
+    parser.add_argument('--outputPath', type=str, required=True, help="Path for reconstructed mesh")
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help="Worker processes for the reference mesh and threads for the distance matrix")
+    parser.add_argument('--tvmeditor', type=str, default="TVMEditor.Test/bin/Release/net5.0/TVMEditor.Test", help="TVMEditor.Test executable, relative to tvm-editing")
+    parser.add_argument('--results', type=str, default=None, help="JSON-lines file with one result per GoF (default: <outputPath>/sequence_results.jsonl)")
+    parser.add_argument('--restart', action='store_true', help="Process every GoF again instead of skipping the ones already in --results")
+
+    args = parser.parse_args(argv)
+    args.processes = max(1, args.processes or 1)
+
+    results_path = args.results or os.path.join(args.outputPath, "sequence_results.jsonl")
+    os.makedirs(os.path.dirname(os.path.abspath(results_path)), exist_ok=True)
+    done = set() if args.restart else completed_windows(results_path)
+
+    # frames shared by consecutive GoFs are loaded and indexed once and everything else is dropped
+    # when the window moves on, so memory is bounded by a single GoF; with the default --stride
+    # (= --gof_size) GoFs share no frames and every frame is loaded once anyway
+    frames = SequenceFrames(GoFPaths(args.dataset, args.num_centers, args.fileNamePrefix),
+                            center_files(args.centers_dir)[args.frame_offset:], args.firstIndex, args.num_centers,
+                            ArrayCache(os.path.join(args.centers_dir, "cache")), args.processes)
+    for first, last in gof_windows(args.firstIndex, args.lastIndex, args.gof_size, args.stride):
+        if (first, last) in done:
+            print(f"GoF {first:03}-{last:03} already done, skipping")
+            continue
+        print(f"GoF {first:03}-{last:03}")
+        start = time.time()
+        entry = {"firstIndex": first, "lastIndex": last}
+        try:
+            entry.update(run_gof(args, frames, first, last))
+            entry["ok"] = True
+        except Exception as e:
+            # the next GoF starts from its own inputs, so one failing GoF does not stop the sequence
+            print(f"GoF {first:03}-{last:03} failed: {type(e).__name__}: {e}")
+            entry.update(ok=False, error=f"{type(e).__name__}: {e}")
+        entry["seconds"] = time.time() - start
+        with open(results_path, 'a') as file:
+            file.write(json.dumps(entry) + "\n")
+
+
+if __name__ == "__main__":
+    main()
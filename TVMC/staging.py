@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import shutil
+
+MODES = ("hardlink", "symlink", "copy")
+CHECKS = ("stat", "hash")
+MANIFEST_NAME = "staging_manifest.json"
+
+# what to try, in order, for each requested mode
+_FALLBACKS = {"hardlink": ("hardlink", "copy"), "symlink": ("symlink", "hardlink", "copy"), "copy": ("copy",)}
+
+_CHUNK_SIZE = 1 << 20
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Stager:
+    """Stage input files into a working directory without redundant I/O.
+
+    Files are hardlinked or symlinked into place when the filesystem allows it and copied
+    otherwise. A manifest in the staging root records the source and its signature (size and
+    mtime, or a content hash with check='hash') for every staged file, so staging the same group
+    again only touches files whose source has changed. Staged links share data with the sources
+    and must be treated as read-only.
+    """
+
+    def __init__(self, root, mode="hardlink", check="stat"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown staging mode '{mode}', expected one of {MODES}")
+        if check not in CHECKS:
+            raise ValueError(f"Unknown staging check '{check}', expected one of {CHECKS}")
+        self.root = root
+        self.mode = mode
+        self.check = check
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        self.manifest = {}
+        # targets passed to stage() in this session, whether or not they had to be refreshed
+        self.staged = set()
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r') as file:
+                self.manifest = json.load(file)
+
+    def _signature(self, source):
+        stat = os.stat(source)
+        signature = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if self.check == "hash":
+            signature["sha256"] = _sha256(source)
+        return signature
+
+    def _is_current(self, source, target, entry):
+        if entry is None or entry["source"] != source or not os.path.exists(target):
+            return False
+        if entry["mode"] == "hardlink":
+            # a hardlink always shows the source's current content unless the source was replaced
+            return os.path.samefile(source, target)
+        if entry["mode"] == "symlink":
+            return os.path.islink(target) and os.readlink(target) == source
+        signature = self._signature(source)
+        return all(entry.get(key) == value for key, value in signature.items())
+
+    def _link(self, source, tmp_target):
+        for mode in _FALLBACKS[self.mode]:
+            try:
+                if mode == "hardlink":
+                    os.link(source, tmp_target)
+                elif mode == "symlink":
+                    os.symlink(source, tmp_target)
+                else:
+                    shutil.copy2(source, tmp_target)
+                return mode
+            except OSError:
+                # e.g. cross-device links, or no symlink privilege on Windows
+                if mode == "copy":
+                    raise
+
+    def stage(self, source, target):
+        """Make target provide source's content. Returns True if anything was linked or copied."""
+        source = os.path.abspath(source)
+        if os.path.isdir(target):
+            target = os.path.join(target, os.path.basename(source))
+        key = os.path.relpath(os.path.abspath(target), os.path.abspath(self.root))
+        self.staged.add(key)
+        if self._is_current(source, target, self.manifest.get(key)):
+            return False
+
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+        tmp_target = target + ".staging"
+        if os.path.lexists(tmp_target):
+            os.remove(tmp_target)
+        mode = self._link(source, tmp_target)
+        os.replace(tmp_target, target)
+        self.manifest[key] = dict(source=source, mode=mode, **self._signature(source))
+        return True
+
+    def prune(self):
+        """Remove previously staged files that were not staged in this session.
+
+        Used when moving from one group of frames to the next, so the staging directory only
+        holds the current group. Returns the number of removed files.
+        """
+        removed = 0
+        for key in [key for key in self.manifest if key not in self.staged]:
+            target = os.path.join(self.root, key)
+            if os.path.lexists(target):
+                os.remove(target)
+                removed += 1
+            del self.manifest[key]
+        return removed
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(self.manifest, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
@@ -0,0 +1,99 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+
+def nearest_indices(points, queries, workers=-1, tree=None):
+    """Index of the nearest point for every query, as one batched KD-tree query.
+
+    workers is the number of threads used by the query (-1 uses all cores). tree is an optional
+    cKDTree of points built earlier, which is queried instead of building a new one.
+    """
+    if tree is None:
+        from scipy.spatial import cKDTree
+
+        tree = cKDTree(np.asarray(points))
+    _, indices = tree.query(np.asarray(queries), k=1, workers=workers)
+    return indices
+
+
+def subdivide_surface_fitting(decimated_mesh, target_mesh, iterations=1, workers=-1, target_tree=None):
+    """Midpoint-subdivide decimated_mesh and snap every new vertex onto its nearest target vertex.
+
+    target_mesh may also be given as its (N, 3) vertices, and target_tree as a cKDTree of them.
+    """
+    import open3d as o3d
+
+    subdivided_mesh = o3d.geometry.TriangleMesh.subdivide_midpoint(decimated_mesh, number_of_iterations=iterations)
+    subdivided_mesh.compute_vertex_normals()
+
+    target_vertices = np.asarray(target_mesh if isinstance(target_mesh, np.ndarray) else target_mesh.vertices)
+    subdivided_vertices = np.asarray(subdivided_mesh.vertices)
+    fitting_vertices = target_vertices[nearest_indices(target_vertices, subdivided_vertices, workers, target_tree)]
+
+    subdivided_mesh.vertices = o3d.utility.Vector3dVector(fitting_vertices)
+    return subdivided_mesh
+
+
+def fit_frame(deformed_reference_path, target_path, workers=-1, fitting_mesh_path=None):
+    """Fitted vertices of one frame: the subdivided deformed reference mesh snapped onto the target.
+
+    The vertices are returned in the order of the subdivided reference mesh, ready to be turned
+    into displacements. fitting_mesh_path optionally writes the fitting mesh as an OBJ for debugging.
+    """
+    import open3d as o3d
+
+    deformed_reference = o3d.io.read_triangle_mesh(deformed_reference_path)
+    target = o3d.io.read_triangle_mesh(target_path)
+    deformed_reference.compute_vertex_normals()
+    target.compute_vertex_normals()
+    fitting_mesh = subdivide_surface_fitting(deformed_reference, target, 1, workers)
+    if fitting_mesh_path is not None:
+        o3d.io.write_triangle_mesh(fitting_mesh_path, fitting_mesh, write_vertex_normals=False,
+                                   write_vertex_colors=False, write_triangle_uvs=False)
+    return np.asarray(fitting_mesh.vertices).copy()
+
+
+def fit_frames(deformed_reference_paths, target_paths, fitting_mesh_paths=None, processes=1, workers=-1):
+    """fit_frame for every frame of a group, optionally in a pool of worker processes.
+
+    Frames are independent, so with processes > 1 each one is fitted in its own process and only
+    the vertex arrays travel back to the parent. Results are returned in the order of the input
+    paths regardless of which frame finishes first. Callers running processes > 1 must guard their
+    entry point with `if __name__ == "__main__":`.
+    """
+    if fitting_mesh_paths is None:
+        fitting_mesh_paths = [None] * len(deformed_reference_paths)
+    processes = min(processes, len(deformed_reference_paths))
+    if processes <= 1:
+        return [fit_frame(deformed, target, workers, fitting)
+                for deformed, target, fitting in zip(deformed_reference_paths, target_paths, fitting_mesh_paths)]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(partial(fit_frame, workers=workers), deformed_reference_paths, target_paths,
+                                 fitting_mesh_paths))
+
+
+def fit_decimated_frame(mesh_path, key_mesh_path, number_of_triangles, workers=-1):
+    """Decimate one deformed frame and fit its subdivision onto the key frame.
+
+    Returns the fitted vertices and vertex normals together with the seconds spent on
+    decimation and on fitting, so it can run in a worker process and only ship arrays back.
+    """
+    import open3d as o3d
+
+    mesh = o3d.io.read_triangle_mesh(mesh_path)
+    key_mesh = o3d.io.read_triangle_mesh(key_mesh_path)
+    mesh.compute_vertex_normals()
+    key_mesh.compute_vertex_normals()
+
+    start = time.time()
+    decimated_mesh = o3d.geometry.TriangleMesh.simplify_quadric_decimation(mesh, number_of_triangles, boundary_weight=8000)
+    decimation_time = time.time() - start
+
+    start = time.time()
+    fitting_mesh = subdivide_surface_fitting(decimated_mesh, key_mesh, 1, workers)
+    fitting_mesh.compute_vertex_normals()
+    fitting_time = time.time() - start
+    return np.asarray(fitting_mesh.vertices).copy(), np.asarray(fitting_mesh.vertex_normals).copy(), decimation_time, fitting_time
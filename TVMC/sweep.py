@@ -0,0 +1,160 @@
+import argparse
+import csv
+import os
+import time
+from argparse import Namespace
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from displacement_codecs import CODECS
+from draco_codec import BACKENDS as DRACO_BACKENDS
+from evaluation import evaluate_qp, gof_paths, prepare_gof
+from pipeline import DATASETS
+from reconstruction import MODES as RECONSTRUCTION_MODES
+
+COLUMNS = ["dataset", "codec", "qp", "draco_backend", "total_size", "bitrate_mbps", "reference_bitrate_mbps", "displacements_bitrate_mbps",
+           "mean_encoding_time_ms", "mean_decoding_time_ms", "decoding_time_ms", "d1_mean", "d2s_mean", "logmse_mean",
+           "logrmse_mean", "hausdorff_mean", "seconds", "error"]
+
+
+def dataset_args(dataset, encoder_path, decoder_path, workers=1, reconstruction="lookup", jobs=1, draco_backend="auto"):
+    """evaluation.py arguments for one of the datasets of the paper."""
+    config = DATASETS[dataset]
+    return Namespace(dataset=dataset, num_frames=config["lastIndex"] - config["firstIndex"] + 1,
+                     num_centers=config["num_centers"], firstIndex=config["firstIndex"], lastIndex=config["lastIndex"],
+                     fileNamePrefix=config["fileNamePrefix"], encoderPath=encoder_path, decoderPath=decoder_path,
+                     outputPath=f"./{dataset}_outputs", workers=workers, reconstruction=reconstruction,
+                     write_fitting_meshes=False, jobs=jobs, draco_backend=draco_backend, codec="draco",
+                     per_gof_reference=False)
+
+
+def _evaluate(args, gof, codec, qp):
+    # runs in a worker process; every codec and qp writes to its own directories
+    start = time.time()
+    args = Namespace(**dict(vars(args), codec=codec))
+    gof_dir = os.path.join(gof_paths(args).gof_dir(args.num_frames), codec, f"qp{qp}")
+    try:
+        row = evaluate_qp(args, gof, qp, os.path.join(args.outputPath, codec, f"qp{qp}"), gof_dir, verbose=False)
+    except Exception as e:
+        # a failing qp only costs its own row
+        row = {"dataset": args.dataset, "codec": codec, "qp": qp, "error": f"{type(e).__name__}: {e}"}
+    row["seconds"] = time.time() - start
+    return row
+
+
+def run_sweep(datasets, qps, encoder_path, decoder_path, processes=None, workers=1, reconstruction="lookup", jobs=1,
+              draco_backend="auto", codecs=("draco",), on_row=None):
+    """Evaluate every dataset with every displacement codec at every qp, one row per combination.
+
+    The QP-independent work (fitting, displacement files, reference mesh coding and decoder setup,
+    original meshes) runs once per dataset, so all codecs code the same displacements; only the
+    displacement coding, reconstruction and metrics are fanned out over a process pool. The
+    returned rows are ordered by dataset, codec and qp. A failure, in the preparation or in a
+    worker, is recorded in the error column of the rows it affects. on_row is called with every
+    row as soon as it is known, i.e. in the order the evaluations finish, e.g. to append it to the
+    table, so rows survive a later crash.
+    """
+    rows = []
+    futures = {}
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for dataset in datasets:
+            args = dataset_args(dataset, encoder_path, decoder_path, workers, reconstruction, jobs, draco_backend)
+            print(f"Preparing dataset: {dataset}", flush=True)
+            try:
+                gof = prepare_gof(args, verbose=False)
+            except Exception as e:
+                print(f"Failed to prepare dataset {dataset}: {e}")
+                for codec in codecs:
+                    for qp in qps:
+                        rows.append({"dataset": dataset, "codec": codec, "qp": qp,
+                                     "error": f"preparation failed: {type(e).__name__}: {e}"})
+                        if on_row is not None:
+                            on_row(rows[-1])
+                continue
+            # qps of this dataset start while the next dataset is being prepared
+            for codec in codecs:
+                for qp in qps:
+                    futures[executor.submit(_evaluate, args, gof, codec, qp)] = len(rows)
+                    rows.append({"dataset": dataset, "codec": codec, "qp": qp})
+        for future in as_completed(futures):
+            position = futures[future]
+            try:
+                rows[position] = future.result()
+            except Exception as e:
+                # e.g. BrokenProcessPool when a worker died
+                rows[position]["error"] = f"{type(e).__name__}: {e}"
+            if on_row is not None:
+                on_row(rows[position])
+    return rows
+
+
+def run_sweep_to_table(path, datasets, qps, encoder_path, decoder_path, **options):
+    """run_sweep, writing its rows to the table at path.
+
+    Rows are appended as they finish, so a crash keeps everything computed up to then; at the end
+    the table is rewritten in the order of the returned rows. options are passed to run_sweep.
+    """
+    start_table(path)
+    rows = run_sweep(datasets, qps, encoder_path, decoder_path, on_row=lambda row: append_row(path, row), **options)
+    write_table(path, rows)
+    return rows
+
+
+def start_table(path):
+    """Create (or truncate) the table at path with just its header, for append_row."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', newline='') as file:
+        csv.DictWriter(file, fieldnames=COLUMNS).writeheader()
+
+
+def append_row(path, row):
+    with open(path, 'a', newline='') as file:
+        csv.DictWriter(file, fieldnames=COLUMNS).writerow(row)
+
+
+def write_table(path, rows):
+    start_table(path)
+    with open(path, 'a', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=COLUMNS)
+        for row in rows:
+            writer.writerow(row)
+
+
+def read_table(path):
+    """Rows of a table written by write_table, with numbers converted back to floats."""
+    with open(path, 'r', newline='') as file:
+        rows = list(csv.DictReader(file))
+    for row in rows:
+        for column in COLUMNS:
+            if column not in ("dataset", "codec", "draco_backend", "error") and row.get(column):
+                row[column] = float(row[column])
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rate-distortion sweep over datasets and qps.")
+    parser.add_argument('--datasets', type=str, nargs='+', default=list(DATASETS), choices=list(DATASETS), help="Datasets to evaluate")
+    parser.add_argument('--qps', type=int, nargs='+', default=list(range(7, 17)), help="Quantization parameters for the displacements")
+    parser.add_argument('--encoderPath', type=str, default="../draco/build/draco_encoder", help="encoderPath")
+    parser.add_argument('--decoderPath', type=str, default="../draco/build/draco_decoder", help="decoderPath")
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help="qps evaluated in parallel worker processes")
+    parser.add_argument('--workers', type=int, default=1, help="Threads for nearest-neighbour queries in each process")
+    parser.add_argument('--reconstruction', type=str, default="lookup", choices=RECONSTRUCTION_MODES, help="Reconstruction mode, see evaluation.py")
+    parser.add_argument('--jobs', type=int, default=1, help="Displacement frames coded concurrently per evaluated qp")
+    parser.add_argument('--draco_backend', type=str, default="auto", choices=DRACO_BACKENDS, help="Draco backend, see evaluation.py")
+    parser.add_argument('--codecs', type=str, nargs='+', default=["draco"], choices=list(CODECS), help="Displacement codecs to compare, see evaluation.py")
+    parser.add_argument('--output', type=str, default="./results/rd_results.csv", help="CSV table with one row per dataset, codec and qp")
+    args = parser.parse_args(argv)
+
+    rows = run_sweep_to_table(args.output, args.datasets, args.qps, args.encoderPath, args.decoderPath,
+                              processes=args.processes, workers=args.workers, reconstruction=args.reconstruction,
+                              jobs=args.jobs, draco_backend=args.draco_backend, codecs=args.codecs)
+    for row in rows:
+        if row.get("error"):
+            print(f"{row['dataset']}, {row['codec']}, qp = {row['qp']}: failed ({row['error']})")
+        else:
+            print(f"{row['dataset']}, {row['codec']}, qp = {row['qp']}: bitrate (Mbps): {row['bitrate_mbps']}, D2-PSNR: {row['d2s_mean']}")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+
+# Binary exchange format shared with TVMEditor/IO/TransformationsIO.cs. All values are
+# little-endian. The 20-byte header holds five uint32 values:
+#   magic ("TVMB"), version, dtype (DTYPE_INT32 or DTYPE_FLOAT32), count, components
+# followed by count * components values of the given dtype.
+MAGIC = int.from_bytes(b'TVMB', 'little')
+VERSION = 1
+DTYPE_INT32 = 0
+DTYPE_FLOAT32 = 1
+
+_DTYPES = {DTYPE_INT32: np.dtype('<i4'), DTYPE_FLOAT32: np.dtype('<f4')}
+_HEADER_SIZE = 5 * 4
+
+FORMATS = ("binary", "text")
+
+
+def _write_binary(path, values, dtype_code):
+    values = np.ascontiguousarray(values, dtype=_DTYPES[dtype_code])
+    if values.ndim == 1:
+        values = values.reshape(-1, 1)
+    header = np.array([MAGIC, VERSION, dtype_code, values.shape[0], values.shape[1]], dtype='<u4')
+    with open(path, 'wb') as file:
+        file.write(header.tobytes() + values.tobytes())
+
+
+def _read_binary(path, dtype_code):
+    data = np.fromfile(path, dtype=np.uint8)
+    magic, version, stored_dtype, count, components = np.frombuffer(data[:_HEADER_SIZE], dtype='<u4')
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a TVMC binary file")
+    if version != VERSION:
+        raise ValueError(f"{path} has unsupported version {version}")
+    if stored_dtype != dtype_code:
+        raise ValueError(f"{path} stores dtype {stored_dtype}, expected {dtype_code}")
+    values = np.frombuffer(data[_HEADER_SIZE:], dtype=_DTYPES[dtype_code], count=int(count * components))
+    return values.reshape(int(count), int(components))
+
+
+def _remove_other_format(path, extension):
+    # TVMEditor prefers the binary file when both exist, so never leave a stale one behind
+    other = os.path.splitext(path)[0] + extension
+    if os.path.exists(other):
+        os.remove(other)
+
+
+def transformations_path(directory, name, fmt="binary"):
+    return os.path.join(directory, name + (".bin" if fmt == "binary" else ".txt"))
+
+
+def write_transformations(path, dual_quaternions):
+    """Write (count, 8) dual quaternions; the format follows the file extension (.bin or .txt)."""
+    if path.endswith(".bin"):
+        _write_binary(path, dual_quaternions, DTYPE_FLOAT32)
+        _remove_other_format(path, ".txt")
+    else:
+        # 9 significant digits round-trip float32 exactly
+        np.savetxt(path, np.asarray(dual_quaternions, dtype=np.float32), fmt='%.9g', delimiter=';')
+        _remove_other_format(path, ".bin")
+
+
+def write_indices(path, indices):
+    if path.endswith(".bin"):
+        _write_binary(path, indices, DTYPE_INT32)
+        _remove_other_format(path, ".txt")
+    else:
+        np.savetxt(path, indices, fmt='%d')
+        _remove_other_format(path, ".bin")
+
+
+def read_transformations(path):
+    if path.endswith(".bin"):
+        return _read_binary(path, DTYPE_FLOAT32)
+    return np.loadtxt(path, delimiter=';', dtype=np.float32, ndmin=2)
+
+
+def read_indices(path):
+    if path.endswith(".bin"):
+        return _read_binary(path, DTYPE_INT32).ravel()
+    return np.loadtxt(path, dtype=np.int32, ndmin=1)
@@ -0,0 +1,11 @@
+"""In-process API of the TVMC pipeline.
+
+The functions take arrays (or Open3D meshes) and a GoFPaths layout instead of command-line
+arguments, so drivers can run many evaluations in one process. The package builds on the
+modules next to it, so the TVMC directory has to be on sys.path (it is when running from it).
+"""
+from tvmc.api import (compute_displacements, decode_gof, encode_gof, encode_reference_mesh, evaluate,
+                      extract_reference_mesh, fit, load_original_meshes, reference_centers, stage_gof_inputs,
+                      subdivided_vertices, write_gof_transformations)
+from tvmc.frames import SequenceFrames
+from tvmc.paths import GoFPaths
@@ -0,0 +1,4 @@
+from tvmc.cli import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from array_cache import derive_key
+from center_distances import DEFAULT_MEMORY_BUDGET, max_distance_matrix
+from center_embedding import embed, stress
+from draco_driver import decode_command, encode_command, parse_ms, run_chains
+from dual_quaternions import estimate_rotations, get_dual_quaternions
+from mesh_metrics import metrics_from_arrays
+from reference_extraction import aggregate_point_sets, auto_poisson_reconstruction, oriented_point_cloud, poisson_reconstruction
+from staging import Stager
+from surface_fitting import fit_decimated_frame, subdivide_surface_fitting
+from transformations_io import transformations_path, write_indices, write_transformations
+
+METRICS = ("d1", "d2", "logmse", "logrmse", "hausdorff")
+
+
+def _mesh(mesh):
+    import open3d as o3d
+
+    # Open3D meshes are used as they are, anything else is read as a path
+    if isinstance(mesh, o3d.geometry.TriangleMesh):
+        return mesh
+    return o3d.io.read_triangle_mesh(str(mesh), enable_post_processing=False)
+
+
+def _failed(jobs):
+    failed_jobs = [job for job in jobs if not job.ok]
+    if failed_jobs:
+        raise RuntimeError(f"{len(failed_jobs)} of {len(jobs)} Draco jobs failed, first: "
+                           f"{failed_jobs[0].name}: {failed_jobs[0].error}")
+
+
+def _align(embedding, centers):
+    # rigid (SVD) alignment of the embedding onto the centers
+    centers_mean = np.mean(centers, axis=0)
+    embedding_mean = np.mean(embedding, axis=0)
+    U, _, Vt = np.linalg.svd(np.dot((centers - centers_mean).T, embedding - embedding_mean))
+    return np.dot(embedding - embedding_mean, np.dot(U, Vt).T) + centers_mean
+
+
+def reference_centers(frames, num_centers=None, random_state=None, mds_backend="smacof", n_landmarks=500, cache=None,
+                      key=None, block_size=None, memory_budget=DEFAULT_MEMORY_BUDGET, workers=None):
+    """Reference centers of a GoF: the MDS embedding of its max-distance matrix, aligned to its first frame.
+
+    frames is the (frames, centers, 3) center sequence (see center_loader). With an
+    array_cache.ArrayCache and key, the content key of the frames (get_reference_center.py uses
+    hash_inputs of the center files, num_frames and num_centers), the distance matrix and the
+    embedding are read from and written to the cache. Returns a dict with the aligned centers,
+    the random_state used and the stress-1 of the embedding.
+    """
+    frames = np.asarray(frames)
+    num_centers = num_centers or frames.shape[1]
+    use_cache = cache is not None and key is not None
+    distance_matrix = cache.load("distance_matrix", key) if use_cache else None
+    if distance_matrix is None:
+        distance_matrix = max_distance_matrix(frames, num_centers, block_size=block_size, memory_budget=memory_budget,
+                                              workers=workers)
+        if use_cache:
+            cache.save("distance_matrix", key, distance_matrix)
+
+    if random_state is None:
+        random_state = np.random.randint(0, 100000)
+    mds_params = dict(backend=mds_backend, n_components=3, eps=1e-10, n_init=6, max_iter=300)
+    if mds_backend == "landmark":
+        mds_params["n_landmarks"] = n_landmarks
+    embedding_key = derive_key(key, random_state=random_state, **mds_params) if use_cache else None
+    embedding = cache.load("mds_embedding", embedding_key) if use_cache else None
+    if embedding is None:
+        embedding = embed(distance_matrix, random_state=random_state, **mds_params)
+        if use_cache:
+            cache.save("mds_embedding", embedding_key, embedding)
+    return {
+        "centers": _align(np.asarray(embedding), frames[0, :num_centers]),
+        "random_state": random_state,
+        "stress": stress(distance_matrix, embedding),
+    }
+
+
+def stage_gof_inputs(paths, mesh_paths, center_paths, reference_centers_path, mode="hardlink", check="stat"):
+    """Place the meshes and centers of a GoF and its reference centers into the TVMEditor Data directory.
+
+    Files are linked or copied with staging.Stager, skipping the ones that are up to date, and
+    files of other GoFs are removed, as TVMEditor loads whole directories. The reference centers
+    are staged as reference_center/reference_centers_aligned.xyz, whatever their file is called.
+    The Data and output directories TVMEditor expects are created. Returns the numbers of staged
+    and removed files.
+    """
+    for directory in ("centers", "meshes", "reference_center", "reference_mesh"):
+        os.makedirs(os.path.join(paths.data_dir, directory), exist_ok=True)
+    for directory in ("output", "reference"):
+        os.makedirs(os.path.join(paths.output_dir, directory), exist_ok=True)
+
+    stager = Stager(paths.data_dir, mode=mode, check=check)
+    staged = 0
+    for path in mesh_paths:
+        staged += stager.stage(path, os.path.join(paths.data_dir, "meshes", os.path.basename(path)))
+    for path in center_paths:
+        staged += stager.stage(path, os.path.join(paths.data_dir, "centers", os.path.basename(path)))
+    staged += stager.stage(reference_centers_path,
+                           os.path.join(paths.data_dir, "reference_center", "reference_centers_aligned.xyz"))
+    removed = stager.prune()
+    stager.save()
+    return staged, removed
+
+
+def write_gof_transformations(paths, centers, reference, first_index, fmt="binary", rotations=False,
+                              rotation_neighbors=8):
+    """Write the indices and (inverse) transformations of every frame of a GoF for TVMEditor.
+
+    centers is the (frames, centers, 3) center sequence of the GoF and reference its aligned
+    reference centers. Without rotations every transformation is a pure translation. Returns the
+    (frames, centers) mask of the centers that moved.
+    """
+    center_rotations = estimate_rotations(centers, reference, rotation_neighbors) if rotations else None
+    moved, dual_quaternions, inverse_dual_quaternions = get_dual_quaternions(centers, reference, center_rotations)
+    for k in range(len(centers)):
+        i = first_index + k
+        write_indices(transformations_path(paths.data_dir, f"indices_{i:03}", fmt), np.flatnonzero(moved[k]))
+        write_transformations(transformations_path(paths.data_dir, f"transformations_{i:03}", fmt), dual_quaternions[k])
+        write_transformations(transformations_path(paths.data_dir, f"inverse_transformations_{i:03}", fmt),
+                              inverse_dual_quaternions[k])
+    return moved
+
+
+def extract_reference_mesh(deformed_mesh_paths, key, processes=1, workers=-1, voxel_size=0, poisson_depth=9,
+                           poisson_scale=1.1, density_quantile=0, poisson_max_error=1e-3):
+    """Decimated reference mesh of a GoF from its deformed meshes (TVMEditor output).
+
+    Every frame but the key frame is decimated and fitted onto the key frame, in worker processes
+    when processes > 1 (callers then need an `if __name__ == "__main__":` guard). The points of all
+    frames are Poisson-reconstructed at poisson_depth, or at the depth picked by
+    reference_extraction.auto_poisson_reconstruction for 'auto', and the surface is decimated to a
+    quarter of the key frame's triangles. Returns a dict with the mesh, the number of Poisson
+    input points, the (frame, decimation seconds, fitting seconds) of every fitted frame and the
+    depth report (empty unless 'auto').
+    """
+    import open3d as o3d
+
+    key_mesh = o3d.io.read_triangle_mesh(deformed_mesh_paths[key])
+    key_mesh.compute_vertex_normals()
+    frames = [k for k in range(len(deformed_mesh_paths)) if k != key]
+    fit_frame = partial(fit_decimated_frame, key_mesh_path=deformed_mesh_paths[key],
+                        number_of_triangles=round(len(key_mesh.triangles) / 4), workers=workers)
+    if processes > 1 and len(frames) > 1:
+        with ProcessPoolExecutor(max_workers=min(processes, len(frames))) as executor:
+            results = list(executor.map(fit_frame, [deformed_mesh_paths[k] for k in frames]))
+    else:
+        results = [fit_frame(deformed_mesh_paths[k]) for k in frames]
+    frame_times = [(k, decimation_time, fitting_time) for k, (_, _, decimation_time, fitting_time) in zip(frames, results)]
+
+    # the fitted frames followed by the key frame make up the points for Poisson reconstruction
+    point_sets = [(vertices, normals) for vertices, normals, _, _ in results]
+    point_sets.append((np.asarray(key_mesh.vertices), np.asarray(key_mesh.vertex_normals)))
+    del results
+    points, normals = aggregate_point_sets(point_sets)
+    point_cloud = oriented_point_cloud(points, normals, voxel_size)
+    del points, normals
+
+    target_triangles = round(len(key_mesh.triangles) * 0.25)
+    report = []
+    if poisson_depth == "auto":
+        pre_reference_mesh, report = auto_poisson_reconstruction(point_cloud, target_triangles, poisson_max_error,
+                                                                 poisson_scale, density_quantile)
+    else:
+        pre_reference_mesh = poisson_reconstruction(point_cloud, int(poisson_depth), poisson_scale, density_quantile)
+    pre_reference_mesh.compute_vertex_normals()
+    reference_mesh = o3d.geometry.TriangleMesh.simplify_quadric_decimation(pre_reference_mesh, target_triangles,
+                                                                           boundary_weight=8000)
+    reference_mesh.compute_vertex_normals()
+    return {
+        "mesh": reference_mesh,
+        "points": len(point_cloud.points),
+        "frame_times": frame_times,
+        "report": report,
+    }
+
+
+def fit(deformed_reference, target, workers=-1, target_tree=None):
+    """Fitted vertices of one frame: the subdivided deformed reference mesh snapped onto the target.
+
+    deformed_reference and target are Open3D triangle meshes or paths to them; target may also be
+    its (N, 3) vertices, and target_tree a scipy cKDTree of them kept from an earlier GoF.
+    """
+    if not isinstance(target, np.ndarray):
+        target = _mesh(target)
+    fitting_mesh = subdivide_surface_fitting(_mesh(deformed_reference), target, 1, workers, target_tree)
+    return np.asarray(fitting_mesh.vertices).copy()
+
+
+def subdivided_vertices(reference_mesh):
+    """Vertices of the reference mesh after one midpoint subdivision, the base of the displacements."""
+    import open3d as o3d
+
+    subdivided = o3d.geometry.TriangleMesh.subdivide_midpoint(_mesh(reference_mesh), number_of_iterations=1)
+    return np.asarray(subdivided.vertices).copy()
+
+
+def compute_displacements(fitted_vertices, reference):
+    """(frames, vertices, 3) displacements of a GoF.
+
+    fitted_vertices holds one array per frame (see fit). reference is the decimated reference mesh
+    (mesh or path), or its subdivided vertices when they are already at hand.
+    """
+    if isinstance(reference, np.ndarray):
+        base = reference
+    else:
+        base = subdivided_vertices(reference)
+    displacements = np.empty((len(fitted_vertices),) + base.shape)
+    for m, vertices in enumerate(fitted_vertices):
+        displacements[m] = vertices - base
+    return displacements
+
+
+def load_original_meshes(paths, first_index, last_index):
+    """Vertices and vertex normals of the original meshes first_index..last_index, for evaluate."""
+    import open3d as o3d
+
+    vertices = []
+    normals = []
+    for i in range(first_index, last_index + 1):
+        mesh = o3d.io.read_triangle_mesh(paths.original_mesh(i))
+        mesh.compute_vertex_normals()
+        vertices.append(np.asarray(mesh.vertices).copy())
+        normals.append(np.asarray(mesh.vertex_normals).copy())
+    return vertices, normals
+
+
+def encode_reference_mesh(paths, encoder_path, decoder_path, qp=14, cl=7):
+    """Encode and decode the decimated reference mesh of paths with Draco.
+
+    Returns the size of the encoded file, the decoding time in ms (None when Draco did not report
+    it) and the finished JobResult, whose output callers may log.
+    """
+    job = run_chains([("reference mesh", [
+        encode_command(encoder_path, paths.reference_mesh, paths.encoded_reference_mesh, qp, cl),
+        decode_command(decoder_path, paths.encoded_reference_mesh, paths.decoded_reference_mesh)
+    ])], 1)[0]
+    _failed([job])
+    # draco_decoder reports its time as "ms to decode"; the original evaluation looked for
+    # "ms to encode" here, which is kept so reported decoding times stay comparable
+    return {
+        "file_size": os.path.getsize(paths.encoded_reference_mesh),
+        "decoding_time": parse_ms(job.results[1].stdout, "encode"),
+        "job": job,
+    }
+
+
+def encode_gof(displacements, first_index, qp, paths, codec, gof_dir=None, jobs=None):
+    """Encode the displacements of a GoF at quantization parameter qp.
+
+    codec is a displacement codec (see displacement_codecs.make_displacement_codec); jobs bounds
+    the frames it codes concurrently. Every frame's bitstream is also written to gof_dir
+    (GoF<frames> next to the reference mesh by default). Returns a dict with the bitstreams, their
+    paths, their sizes, the encoding times in ms and the coder output, all in frame order, and the
+    errors of failed frames by position in the GoF; failed frames have None in the other lists.
+    """
+    gof_dir = gof_dir or paths.gof_dir(len(displacements))
+    os.makedirs(gof_dir, exist_ok=True)
+    frames = codec.encode(displacements, qp, jobs)
+    frame_paths = []
+    for m, frame in enumerate(frames):
+        frame_paths.append(paths.encoded_displacements(first_index + m, gof_dir, codec.extension) if frame.ok else None)
+        if frame.ok:
+            with open(frame_paths[-1], 'wb') as file:
+                file.write(frame.value)
+    return {
+        "data": [frame.value for frame in frames],
+        "paths": frame_paths,
+        "sizes": [len(frame.value) if frame.ok else None for frame in frames],
+        "encoding_times": [frame.time for frame in frames],
+        "outputs": [frame.output for frame in frames],
+        "errors": {m: frame.error for m, frame in enumerate(frames) if not frame.ok},
+    }
+
+
+def decode_gof(encoded, gof_decoder, codec, original_displacements=None, jobs=None, mode=None):
+    """Decode the frames of encode_gof and apply them to the decoded reference mesh.
+
+    gof_decoder is a reconstruction.GoFDecoder, used in its own mode unless mode is given
+    ('indexed' for order-preserving codecs); in 'lookup' mode original_displacements (the array
+    passed to encode_gof) is needed to re-associate reordered codec output. Returns the
+    reconstructed vertices, decoding times in ms and decoder output per frame, the total seconds
+    spent applying displacements and the errors of frames that failed to decode by position in the
+    GoF; failed frames have None vertices.
+    """
+    decoded = codec.decode(encoded["data"], jobs)
+    vertices = []
+    deform_time = 0
+    for m, frame in enumerate(decoded):
+        if not frame.ok:
+            vertices.append(None)
+            continue
+        start = time.time()
+        vertices.append(gof_decoder.reconstruct(frame.value, None if original_displacements is None else original_displacements[m],
+                                                mode))
+        deform_time += time.time() - start
+    return {
+        "vertices": vertices,
+        "decoding_times": [frame.time for frame in decoded],
+        "outputs": [frame.output for frame in decoded],
+        "deform_time": deform_time,
+        "errors": {m: frame.error for m, frame in enumerate(decoded) if not frame.ok},
+    }
+
+
+def vertex_normals(vertices, triangles):
+    import open3d as o3d
+
+    mesh = o3d.geometry.TriangleMesh()
+    mesh.vertices = o3d.utility.Vector3dVector(vertices)
+    mesh.triangles = o3d.utility.Vector3iVector(triangles)
+    mesh.compute_vertex_normals()
+    return np.asarray(mesh.vertex_normals).copy()
+
+
+def evaluate(original_vertices, original_normals, reconstructed_vertices, triangles, workers=-1, original_trees=None):
+    """Metrics of every reconstructed frame against its original mesh.
+
+    All arguments but triangles (shared by the reconstructed frames) hold one array per frame;
+    original_trees optionally holds a cKDTree of every frame's original vertices. Returns a dict
+    with the per-frame values of every metric of mesh_metrics and their means under <metric>_mean.
+    """
+    result = {name: [] for name in METRICS}
+    original_trees = original_trees or [None] * len(original_vertices)
+    for original, normals, reconstructed, tree in zip(original_vertices, original_normals, reconstructed_vertices,
+                                                      original_trees):
+        frame_metrics = metrics_from_arrays(original, normals, reconstructed, vertex_normals(reconstructed, triangles),
+                                            workers, tree)
+        for name in METRICS:
+            result[name].append(frame_metrics[name])
+    for name in METRICS:
+        result[f"{name}_mean"] = float(np.mean(result[name]))
+    return result
@@ -0,0 +1,154 @@
+import argparse
+import importlib
+import os
+import runpy
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from tvmc.paths import TVMC_DIR
+
+# name -> (module with main(argv), or script run as __main__, help). Nothing is imported until a
+# command runs, and the scripts themselves import open3d, scipy, sklearn, ... only where they use them.
+COMMANDS = {
+    "reference-centers": ("get_reference_center.py", "Step 2: reference centers of a GoF (MDS)"),
+    "transformations": ("get_transformation.py", "Step 3: transformation dual quaternions"),
+    "reference-mesh": ("extract_reference_mesh", "Step 4: volume-tracked reference mesh"),
+    "displacements": ("get_displacements", "Step 6: displacement fields"),
+    "evaluate": ("evaluation", "Step 7: compression and evaluation of a GoF"),
+    "sweep": ("sweep", "Rate-distortion sweep over datasets, codecs and qps"),
+    "benchmark-codecs": ("benchmark_codecs", "Compare displacement codecs on stored displacements"),
+    "pipeline": ("pipeline", "Steps 1-7, redoing only stages whose inputs changed"),
+    "sequence": ("run_sequence", "Steps 2-7 for a long sequence, GoF by GoF"),
+}
+
+# files written by the displacement codecs
+ENCODED_EXTENSIONS = (".drc", ".tvd")
+
+# modules whose import alone takes a noticeable part of a second or more
+HEAVY_MODULES = ("open3d", "trimesh", "scipy", "sklearn", "matplotlib")
+
+# commands timed by benchmark-startup; {drc} is replaced by a small file for the bitrate command
+STARTUP_COMMANDS = [["--help"], ["plot", "--help"], ["bitrate", "{drc}"]] + [[name, "--help"] for name in COMMANDS]
+
+
+def run_module(module, argv, prog):
+    sys.argv[0] = prog
+    importlib.import_module(module).main(argv)
+
+
+def run_script(script, argv):
+    # the scripts parse sys.argv themselves; runpy sets sys.argv[0] to the script path
+    path = os.path.join(TVMC_DIR, script)
+    sys.argv = [path] + list(argv)
+    runpy.run_path(path, run_name="__main__")
+
+
+def plot(argv):
+    parser = argparse.ArgumentParser(prog="tvmc plot", description="Generate the figures of the paper into ./figures.")
+    parser.add_argument('--all', action='store_true', help="Run the rate-distortion sweep of all four datasets first and plot its results (objective_results_all.py) instead of the published ones")
+    args = parser.parse_args(argv)
+    run_script("objective_results_all.py" if args.all else "objective_results_basic.py", [])
+
+
+def bitrate(argv):
+    parser = argparse.ArgumentParser(prog="tvmc bitrate", description="Bitrate of an encoded GoF, from the file sizes only.")
+    parser.add_argument('files', type=str, nargs='+', help="Encoded displacement files (.drc, .tvd), or directories holding them")
+    parser.add_argument('--reference', type=str, default=None, help="Encoded reference mesh, counted once for the GoF")
+    parser.add_argument('--num_frames', type=int, default=None, help="Frames of the GoF (default: number of displacement files)")
+    parser.add_argument('--frame_rate', type=float, default=30, help="Frames per second")
+    args = parser.parse_args(argv)
+
+    files = []
+    for path in args.files:
+        if os.path.isdir(path):
+            files += sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(ENCODED_EXTENSIONS))
+        else:
+            files.append(path)
+    if not files:
+        parser.error("no encoded displacement files found")
+    duration = (args.num_frames or len(files)) / args.frame_rate
+    displacements_size = sum(os.path.getsize(path) for path in files)
+    reference_size = os.path.getsize(args.reference) if args.reference else 0
+    print(f"Displacements: {len(files)} files, {displacements_size} bytes, {displacements_size * 8 / duration / 1000000:.2f} Mbps")
+    if args.reference:
+        print(f"Reference: {reference_size} bytes, {reference_size * 8 / duration / 1000000:.2f} Mbps")
+    total_size = displacements_size + reference_size
+    print(f"Overall: {total_size} bytes, {total_size * 8 / duration / 1000000:.2f} Mbps")
+
+
+def _heavy_imports(command):
+    # -X importtime reports every imported module on stderr
+    result = subprocess.run([sys.executable, "-X", "importtime", "-m", "tvmc"] + command, cwd=TVMC_DIR,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    imported = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            imported.add(line.rsplit("|", 1)[1].strip().split(".")[0])
+    return sorted(imported.intersection(HEAVY_MODULES))
+
+
+def benchmark_startup(argv):
+    parser = argparse.ArgumentParser(prog="tvmc benchmark-startup",
+                                     description="Time the startup of the commands that should not load the heavy dependencies.")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per command, the median is reported")
+    parser.add_argument('--budget', type=float, default=1.0, help="Seconds a command may take; exits with an error if one is slower")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        drc = os.path.join(directory, "dis_000.drc")
+        with open(drc, 'wb') as file:
+            file.write(bytes(1000))
+
+        baseline = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", "pass"], check=True)
+            baseline.append(time.perf_counter() - start)
+        print(f"{'python -c pass':<36} {statistics.median(baseline):8.3f} s")
+
+        slow = []
+        for command in STARTUP_COMMANDS:
+            command = [drc if part == "{drc}" else part for part in command]
+            seconds = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                subprocess.run([sys.executable, "-m", "tvmc"] + command, cwd=TVMC_DIR, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+                seconds.append(time.perf_counter() - start)
+            median = statistics.median(seconds)
+            heavy = _heavy_imports(command)
+            name = " ".join("<file>" if part == drc else part for part in command)
+            print(f"{'tvmc ' + name:<36} {median:8.3f} s  {'imports ' + ', '.join(heavy) if heavy else ''}")
+            if median > args.budget:
+                slow.append(name)
+    if slow:
+        raise SystemExit(f"over the {args.budget} s budget: {', '.join(slow)}")
+
+
+def main(argv=None):
+    epilog = "commands:\n" + "\n".join(f"  {name:<20}{help_text}" for name, (_, help_text) in COMMANDS.items()) + (
+        f"\n  {'plot':<20}Figures of the paper\n"
+        f"  {'bitrate':<20}Bitrate of encoded files, without decoding them\n"
+        f"  {'benchmark-startup':<20}Time the startup of the light commands\n\n"
+        "Run 'tvmc <command> --help' for the options of a command.")
+    parser = argparse.ArgumentParser(prog="tvmc", description="TVMC: time-varying mesh compression.", epilog=epilog,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=list(COMMANDS) + ["plot", "bitrate", "benchmark-startup"], metavar="command")
+    parser.add_argument('args', nargs=argparse.REMAINDER, help="Options of the command")
+    args = parser.parse_args(argv)
+
+    if args.command == "plot":
+        plot(args.args)
+    elif args.command == "bitrate":
+        bitrate(args.args)
+    elif args.command == "benchmark-startup":
+        benchmark_startup(args.args)
+    else:
+        target = COMMANDS[args.command][0]
+        if target.endswith(".py"):
+            run_script(target, args.args)
+        else:
+            run_module(target, args.args, f"tvmc {args.command}")
@@ -0,0 +1,62 @@
+import numpy as np
+
+from center_loader import load_center_sequence
+
+
+class SequenceFrames:
+    """Per-frame data of a long sequence, loaded once and shared by every GoF containing the frame.
+
+    Frames are numbered like the meshes; center_paths holds the center files of the sequence in
+    frame order, starting with first_index. Centers are parsed through center_loader (with its
+    per-frame ArrayCache when center_cache is given). Original meshes are kept as vertices, vertex
+    normals and a cKDTree of the vertices, which serves both as the fitting target and for the
+    metrics. retain(first, last) drops the frames outside the next GoF, so memory is bounded by
+    one GoF however long the sequence is.
+    """
+
+    def __init__(self, paths, center_paths, first_index, num_centers=None, center_cache=None, workers=None):
+        self.paths = paths
+        self.center_paths = list(center_paths)
+        self.first_index = first_index
+        self.num_centers = num_centers
+        self.center_cache = center_cache
+        self.workers = workers
+        self._centers = {}
+        self._originals = {}
+
+    def center_path(self, index):
+        position = index - self.first_index
+        if not 0 <= position < len(self.center_paths):
+            raise IndexError(f"No center file for frame {index}")
+        return self.center_paths[position]
+
+    def centers(self, first, last):
+        """(frames, centers, 3) volume centers of the frames first..last; only new frames are read."""
+        missing = [i for i in range(first, last + 1) if i not in self._centers]
+        if missing:
+            loaded = load_center_sequence([self.center_path(i) for i in missing], self.num_centers, self.workers,
+                                          self.center_cache)
+            for i, centers in zip(missing, loaded):
+                self._centers[i] = np.array(centers)
+        return np.stack([self._centers[i] for i in range(first, last + 1)])
+
+    def original(self, index):
+        """Vertices, vertex normals and cKDTree of the vertices of the original mesh of frame index."""
+        if index not in self._originals:
+            import open3d as o3d
+            from scipy.spatial import cKDTree
+
+            mesh = o3d.io.read_triangle_mesh(self.paths.target_mesh(index))
+            mesh.compute_vertex_normals()
+            vertices = np.asarray(mesh.vertices).copy()
+            self._originals[index] = (vertices, np.asarray(mesh.vertex_normals).copy(), cKDTree(vertices))
+        return self._originals[index]
+
+    def retain(self, first, last):
+        """Drop every frame outside first..last. Returns the number of dropped frames."""
+        dropped = 0
+        for frames in (self._centers, self._originals):
+            for index in [index for index in frames if not first <= index <= last]:
+                del frames[index]
+                dropped += 1
+        return dropped
@@ -0,0 +1,85 @@
+import os
+
+TVMC_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+ROOT_DIR = os.path.dirname(TVMC_DIR)
+EDITOR_DIR = os.path.join(ROOT_DIR, "tvm-editing", "TVMEditor.Test", "bin", "Release", "net5.0")
+TRACKING_DATA_DIR = os.path.join(ROOT_DIR, "arap-volume-tracking", "data")
+
+
+class GoFPaths:
+    """File layout of one dataset in the TVMEditor Data/output directories.
+
+    The defaults match the layout the scripts use; every directory can be overridden, so library
+    callers are not tied to the working directory of the scripts. Given the GoF first_index..
+    last_index, the reference mesh, its coded files and the GoF directory are named after it
+    (decimated_reference_mesh_<first>_<last>.obj, ...), so the GoFs of a sequence keep their own;
+    TVMEditor always reads editor_reference_mesh.
+    """
+
+    def __init__(self, dataset, num_centers, file_name_prefix, editor_dir=EDITOR_DIR, tracking_data_dir=TRACKING_DATA_DIR,
+                 first_index=None, last_index=None):
+        self.dataset = dataset
+        self.num_centers = num_centers
+        self.file_name_prefix = file_name_prefix
+        self.editor_dir = editor_dir
+        self.tracking_data_dir = tracking_data_dir
+        self.first_index = first_index
+        self.last_index = last_index
+        self.gof_suffix = "" if first_index is None else f"_{first_index:03}_{last_index:03}"
+        self.data_dir = os.path.join(editor_dir, "Data", f"{dataset}_{num_centers}")
+        self.output_dir = os.path.join(editor_dir, "output", f"{dataset}_{num_centers}")
+        self.reference_mesh_dir = os.path.join(self.data_dir, "reference_mesh")
+        self.target_mesh_dir = os.path.join(tracking_data_dir, dataset)
+
+    def for_gof(self, first_index, last_index):
+        """The same layout with the files of the GoF first_index..last_index."""
+        return GoFPaths(self.dataset, self.num_centers, self.file_name_prefix, self.editor_dir, self.tracking_data_dir,
+                        first_index, last_index)
+
+    @property
+    def reference_mesh(self):
+        return os.path.join(self.reference_mesh_dir, f"decimated_reference_mesh{self.gof_suffix}.obj")
+
+    @property
+    def editor_reference_mesh(self):
+        """Reference mesh as the second TVMEditor pass reads it."""
+        return os.path.join(self.reference_mesh_dir, "decimated_reference_mesh.obj")
+
+    @property
+    def encoded_reference_mesh(self):
+        return os.path.join(self.reference_mesh_dir, f"encoded_decimated_reference_mesh{self.gof_suffix}.drc")
+
+    @property
+    def decoded_reference_mesh(self):
+        return os.path.join(self.reference_mesh_dir, f"decode_decimated_reference_mesh{self.gof_suffix}.obj")
+
+    def gof_dir(self, num_frames):
+        return os.path.join(self.reference_mesh_dir, f"GoF{num_frames}{self.gof_suffix}")
+
+    def deformed_mesh(self, index):
+        """Frame deformed towards the reference centers by the first TVMEditor pass."""
+        return os.path.join(self.output_dir, "output", f"deformed_{index:03}.obj")
+
+    def deformed_reference_mesh(self, index):
+        return os.path.join(self.output_dir, "reference", f"deformed_reference_mesh_{index:03}.obj")
+
+    def fitting_mesh(self, index):
+        return os.path.join(self.output_dir, "reference", f"fitting_mesh_{index:03}.obj")
+
+    def displacement_store(self, first_index, last_index):
+        return os.path.join(self.output_dir, "reference",
+                            f"displacements_{self.dataset}_{first_index:03}_{last_index:03}.npy")
+
+    def target_mesh(self, index):
+        """Original mesh in the tracking data, the target of the surface fitting."""
+        return os.path.join(self.target_mesh_dir, f"{self.file_name_prefix}{index:03}.obj")
+
+    def original_mesh(self, index):
+        """Original mesh staged into the TVMEditor data directory, the reference for the metrics."""
+        return os.path.join(self.data_dir, "meshes", f"{self.file_name_prefix}{index:03}.obj")
+
+    def displacement_ply(self, index, directory=None):
+        return os.path.join(directory or self.reference_mesh_dir, f"dis_{self.dataset}_{index:03}.ply")
+
+    def encoded_displacements(self, index, gof_dir, extension=".drc"):
+        return os.path.join(gof_dir, f"dis_{self.dataset}_{index:03}{extension}")
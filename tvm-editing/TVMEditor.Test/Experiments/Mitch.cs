@@ -23,7 +23,7 @@ namespace TVMEditor.Test.Experiments
                 for (int index = firstIndex; index < lastIndex + 1; index++)
                 {
                     Console.WriteLine($"Dealing with index={index}");
-                    var (indices, transformations) = TransformationsIO.LoadIndexedTransformations($"{inputDir}/indices_{index:000}.txt", $"{inputDir}/transformations_{index:000}.txt");
+                    var (indices, transformations) = TransformationsIO.LoadIndexedTransformations(TransformationsIO.ResolvePath($"{inputDir}/indices_{index:000}"), TransformationsIO.ResolvePath($"{inputDir}/transformations_{index:000}"));
                     var affinityCalculation = new DistanceDirectionAffinityCalculation
                     {
                         ShapeDistance = 1f
@@ -46,7 +46,7 @@ namespace TVMEditor.Test.Experiments
                 for (int index = firstIndex; index < lastIndex + 1; index++)
                 {
                     Console.WriteLine($"Deform Reference mesh to Mitch {index}...");
-                    var (indices, transformations) = TransformationsIO.LoadIndexedTransformations($"{inputDir}/indices_{index:000}.txt", $"{inputDir}/inverse_transformations_{index:000}.txt");
+                    var (indices, transformations) = TransformationsIO.LoadIndexedTransformations(TransformationsIO.ResolvePath($"{inputDir}/indices_{index:000}"), TransformationsIO.ResolvePath($"{inputDir}/inverse_transformations_{index:000}"));
                     var affinityCalculation = new DistanceDirectionAffinityCalculation
                     {
                         ShapeDistance = 1f
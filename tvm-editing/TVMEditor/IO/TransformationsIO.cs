@@ -1,4 +1,5 @@
-﻿using System.Collections.Generic;
+﻿using System;
+using System.Collections.Generic;
 using System.Globalization;
 using System.IO;
 using System.Numerics;
@@ -8,8 +9,29 @@ namespace TVMEditor.IO
 {
     public static class TransformationsIO
     {
+        // Binary exchange format written by TVMC/transformations_io.py. Little-endian; a header of five
+        // uint32 values (magic "TVMB", version, dtype, count, components) followed by count * components values.
+        private const uint BinaryMagic = 0x424D5654;
+        private const uint BinaryVersion = 1;
+        private const uint DTypeInt32 = 0;
+        private const uint DTypeFloat32 = 1;
+
+        /// <summary>
+        /// Returns the binary (.bin) variant of a transformations or indices file if it exists, the text (.txt) variant otherwise.
+        /// </summary>
+        public static string ResolvePath(string pathWithoutExtension)
+        {
+            var binaryPath = pathWithoutExtension + ".bin";
+            return File.Exists(binaryPath) ? binaryPath : pathWithoutExtension + ".txt";
+        }
+
         public static DualQuaternion[] LoadTransformations(string filePath)
         {
+            if (filePath.EndsWith(".bin"))
+            {
+                return LoadTransformationsBin(filePath);
+            }
+
             var transformations = new List<DualQuaternion>();
 
             using (TextReader tr = new StreamReader(filePath))
@@ -42,8 +64,69 @@ namespace TVMEditor.IO
             return transformations.ToArray();
         }
 
+        public static DualQuaternion[] LoadTransformationsBin(string filePath)
+        {
+            var (count, components, data) = ReadBinary(filePath, DTypeFloat32);
+            if (components != 8)
+                throw new InvalidDataException($"{filePath}: expected 8 components per transformation, found {components}");
+
+            var values = new float[count * components];
+            Buffer.BlockCopy(data, 0, values, 0, data.Length);
+
+            var transformations = new DualQuaternion[count];
+            for (int i = 0; i < count; i++)
+            {
+                var o = i * 8;
+                transformations[i] = new DualQuaternion
+                {
+                    Real = new Quaternion(values[o], values[o + 1], values[o + 2], values[o + 3]),
+                    Dual = new Quaternion(values[o + 4], values[o + 5], values[o + 6], values[o + 7])
+                };
+            }
+
+            return transformations;
+        }
+
+        public static int[] LoadIndicesBin(string filePath)
+        {
+            var (count, components, data) = ReadBinary(filePath, DTypeInt32);
+            var indices = new int[count * components];
+            Buffer.BlockCopy(data, 0, indices, 0, data.Length);
+            return indices;
+        }
+
+        private static (int, int, byte[]) ReadBinary(string filePath, uint dtype)
+        {
+            using (BinaryReader br = new BinaryReader(new FileStream(filePath, FileMode.Open, FileAccess.Read)))
+            {
+                var magic = br.ReadUInt32();
+                var version = br.ReadUInt32();
+                var storedDType = br.ReadUInt32();
+                var count = (int)br.ReadUInt32();
+                var components = (int)br.ReadUInt32();
+
+                if (magic != BinaryMagic)
+                    throw new InvalidDataException($"{filePath} is not a TVMC binary file");
+                if (version != BinaryVersion)
+                    throw new InvalidDataException($"{filePath} has unsupported version {version}");
+                if (storedDType != dtype)
+                    throw new InvalidDataException($"{filePath} stores dtype {storedDType}, expected {dtype}");
+
+                var data = br.ReadBytes(count * components * 4);
+                if (data.Length != count * components * 4)
+                    throw new InvalidDataException($"{filePath} is truncated");
+
+                return (count, components, data);
+            }
+        }
+
         public static (int[], DualQuaternion[]) LoadIndexedTransformations(string indicesFilePath, string transformationsFilePath)
         {
+            if (indicesFilePath.EndsWith(".bin"))
+            {
+                return (LoadIndicesBin(indicesFilePath), LoadTransformations(transformationsFilePath));
+            }
+
             var indices = new List<int>();
 
             using (TextReader tr = new StreamReader(indicesFilePath))